@@ -12,11 +12,19 @@ Panduan penggunaan:
 import os
 import asyncio
 import sys
-from voice import AudioProcessor
+from voice import AudioProcessor, SEND_SAMPLE_RATE, RING_SLOTS
 
 from google import genai
 from google.genai import types
 
+# Gunakan uvloop jika tersedia (tidak tersedia di Windows), lebih ringan untuk
+# banyak frame audio kecil dan pengiriman WebSocket
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 # Konfigurasi API Gemini
 MODEL = "models/gemini-2.0-flash-live-001"
 
@@ -43,6 +51,15 @@ CONFIG = types.LiveConnectConfig(
     ),
 )
 
+# Batas antrian audio balasan (jumlah potongan PCM). Gemini mengirim audio lebih cepat
+# dari real time, jadi batasnya longgar dan penerima menunggu (await put) saat penuh,
+# bukan membuang audio; memori tetap terbatas saat speaker lambat
+PLAYBACK_QUEUE_SIZE = 256
+
+# Gabungkan frame PCM mikrofon sampai ~100 ms sebelum dikirim (16-bit mono)
+AUDIO_SEND_WINDOW = 0.1
+AUDIO_SEND_BYTES = int(SEND_SAMPLE_RATE * 2 * AUDIO_SEND_WINDOW)
+
 class LiveConversation:
     def __init__(self):
         self.audio_processor = AudioProcessor()
@@ -50,10 +67,31 @@ class LiveConversation:
         self.audio_out_queue = None
         self.session = None
 
+    async def _open_stdin_reader(self):
+        """Membuka stdin sebagai StreamReader asyncio (sekali, tanpa thread per prompt)"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+        return reader
+
     async def send_text(self):
         """Mengirim pesan teks ke AI dan menandai akhir giliran"""
+        try:
+            reader = await self._open_stdin_reader()
+        except (NotImplementedError, OSError, ValueError):
+            # Mis. console Windows: kembali ke input() di thread
+            reader = None
+
         while True:
-            text = await asyncio.to_thread(input, "pesan > ")
+            if reader is None:
+                text = await asyncio.to_thread(input, "pesan > ")
+            else:
+                print("pesan > ", end="", flush=True)
+                line = await reader.readline()
+                if not line:  # EOF
+                    break
+                text = line.decode(errors="ignore").rstrip("\r\n")
             if text.lower() == "q":
                 break
             await self.session.send(input=text, end_of_turn=True)
@@ -64,7 +102,8 @@ class LiveConversation:
             turn = self.session.receive()
             async for response in turn:
                 if data := response.data:
-                    self.audio_in_queue.put_nowait(data)
+                    # Menunggu saat antrian penuh: awal jawaban tidak boleh terbuang
+                    await self.audio_in_queue.put(data)
                     continue
                 if text := response.text:
                     print(text, end="")
@@ -73,6 +112,30 @@ class LiveConversation:
             while not self.audio_in_queue.empty():
                 self.audio_in_queue.get_nowait()
 
+    async def send_audio(self):
+        """Mengirim audio mikrofon ke AI, beberapa frame digabung per pesan"""
+        loop = asyncio.get_running_loop()
+        buf = bytearray()
+
+        while True:
+            slot = await self.audio_out_queue.get()
+            self.audio_processor.take_frame(slot, buf)
+            deadline = loop.time() + AUDIO_SEND_WINDOW
+
+            # Tambahkan frame berikutnya sampai target ukuran atau batas waktu tercapai
+            while len(buf) < AUDIO_SEND_BYTES:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    slot = await asyncio.wait_for(self.audio_out_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                self.audio_processor.take_frame(slot, buf)
+
+            await self.session.send(input={"data": bytes(buf), "mime_type": "audio/pcm"})
+            buf.clear()
+
     async def run(self):
         try:
             print("Memulai percakapan live dengan Gemini 2.0")
@@ -84,27 +147,23 @@ class LiveConversation:
             ):
                 self.session = session
                 
-                # Inisialisasi antrian
-                self.audio_in_queue = asyncio.Queue()
-                self.audio_out_queue = asyncio.Queue()
+                # Inisialisasi antrian (dibatasi). Antrian mikrofon berisi indeks slot
+                # ring buffer; saat semua slot terpakai callback membuang frame baru.
+                self.audio_in_queue = asyncio.Queue(maxsize=PLAYBACK_QUEUE_SIZE)
+                self.audio_out_queue = asyncio.Queue(maxsize=RING_SLOTS)
                 
                 # Siapkan audio
-                mic_stream = await self.audio_processor.setup_microphone()
+                mic_stream = await self.audio_processor.setup_microphone(self.audio_out_queue)
                 speaker_stream = await self.audio_processor.setup_speaker()
                 
                 # Buat task
                 send_text_task = tg.create_task(self.send_text())
-                tg.create_task(self.audio_processor.record_audio(mic_stream, self.audio_out_queue))
+                tg.create_task(self.audio_processor.record_audio(mic_stream))
                 tg.create_task(self.receive_response())
                 tg.create_task(self.audio_processor.play_audio(speaker_stream, self.audio_in_queue))
                 
                 # Task untuk mengirim audio ke AI
-                async def send_audio():
-                    while True:
-                        audio_data = await self.audio_out_queue.get()
-                        await self.session.send(input=audio_data)
-                
-                tg.create_task(send_audio())
+                tg.create_task(self.send_audio())
                 
                 # Tunggu sampai pengguna keluar
                 await send_text_task
@@ -3,22 +3,40 @@
 
 import os
 import pickle
+import json
+
+# OpenMP membaca kebijakan tunggu saat inisialisasi, jadi harus diset sebelum import faiss.
+# PASSIVE membuat thread idle tidak busy-wait sehingga latensi interaktif tetap baik.
+os.environ.setdefault("OMP_WAIT_POLICY", "PASSIVE")
+
 import faiss
 import numpy as np
 import google.generativeai as genai
-import json
+from google import genai as google_genai
+from google.genai import types as genai_types
 from typing import List, Dict, Any, Callable, Optional
 from dotenv import load_dotenv
 import datetime
 import webbrowser
 import re
 import sys
+import queue
+import threading
+import time
+import hashlib
+import shelve
+import atexit
+from collections import OrderedDict
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+# Pola tag format rich (mis. [bold]) untuk dibuang saat rich tidak tersedia
+_TAG_RE = re.compile(r'\[.*?\]')
 
 # Try to import rich for better terminal output, but fall back if not available
 try:
     from rich.console import Console
     from rich.panel import Panel
-    from rich.markdown import Markdown
     console = Console()
     RICH_AVAILABLE = True
 except ImportError:
@@ -28,16 +46,25 @@ except ImportError:
         def print(self, *args, **kwargs):
             # Strip any formatting tags if present
             text = str(args[0])
-            text = re.sub(r'\[.*?\]', '', text)
+            if '[' in text:
+                text = _TAG_RE.sub('', text)
             print(text)
         
         def input(self, prompt):
             # Strip any formatting tags
-            prompt = re.sub(r'\[.*?\]', '', prompt)
+            if '[' in prompt:
+                prompt = _TAG_RE.sub('', prompt)
             return input(prompt)
     
     console = SimpleConsole()
 
+# numba opsional: mempercepat re-ranking kandidat dengan cosine exact
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Load environment variables from .env file if it exists
 load_dotenv()
 
@@ -49,108 +76,458 @@ if not GOOGLE_API_KEY:
     
 genai.configure(api_key=GOOGLE_API_KEY)
 
+# Jendela waktu (detik) untuk mengumpulkan kueri yang masuk hampir bersamaan
+# sebelum dikirim sebagai satu batch pencarian
+QUERY_BATCH_WINDOW = 0.02
+
+# Tipe JSON schema untuk tipe parameter fungsi yang didaftarkan
+_SCHEMA_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+# Di bawah jumlah vektor ini index Flat (exact) tetap digunakan
+ANN_MIN_VECTORS = 10_000
+
+# GPU hanya menguntungkan untuk index besar; di bawah ini overhead transfer lebih dominan
+GPU_MIN_VECTORS = 50_000
+
+# Jumlah maksimum embedding kueri di cache disk; yang paling lama tidak dipakai dibuang dulu
+EMB_CACHE_MAX = int(os.environ.get("EMB_CACHE_MAX", 10_000))
+
+# Index pendekatan mengambil top_k * faktor ini kandidat untuk di-rerank
+RERANK_FACTOR = 4
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rerank(query, candidates, out):
+        """Dot product of one query with each candidate row"""
+        for i in prange(candidates.shape[0]):
+            acc = 0.0
+            for j in range(query.shape[0]):
+                acc += query[j] * candidates[i, j]
+            out[i] = acc
+else:
+    def _rerank(query, candidates, out):
+        """Dot product of one query with each candidate row"""
+        np.dot(candidates, query, out=out)
+
+class TextBlob:
+    """Daftar string read-only: satu blob UTF-8 gabungan + offset, keduanya memory-mapped"""
+    
+    def __init__(self, path: str):
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        
+        # mmap cannot map an empty file
+        self._blob = b""
+        if os.path.getsize(f"{path}.bin") > 0:
+            with open(f"{path}.bin", "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, idx: int) -> str:
+        # Only the requested slice is decoded
+        return self._blob[self.offsets[idx]:self.offsets[idx + 1]].decode("utf-8")
+
 class SimpleRAG:
-    def __init__(self, vector_store_path: str = "data/vector_store"):
+    def __init__(self, vector_store_path: str = "data/vector_store", index_desc: Optional[str] = None, nprobe: int = 16, ef_search: int = 64, use_gpu: bool = False):
         self.vector_store_path = vector_store_path
         self.embedding_model = "models/text-embedding-004"
         self.generation_model = "gemini-2.0-flash"  # atau "gemini-2.0-pro" untuk kualitas lebih tinggi
         
-        # Load vector store
-        self.load_vector_store()
-        
-        # Initialize generation model
-        self.model = genai.GenerativeModel(
-            model_name=self.generation_model,
-            generation_config={
-                "temperature": 0.2,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-        )
-        
-        # Register function calls
+        # Konfigurasi index pendekatan (ANN): string index_factory, mis. "IVF1024,PQ32" atau "HNSW32".
+        # None berarti dipilih otomatis dari jumlah vektor, "Flat" mematikan ANN.
+        self.index_desc = index_desc
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # Pindahkan index ke GPU (opsional, hanya berguna bersama pencarian batch)
+        self.use_gpu = use_gpu
+        
+        # Client embedding persisten: satu koneksi HTTPS untuk semua kueri
+        self._client = google_genai.Client(api_key=GOOGLE_API_KEY)
+        
+        # Konfigurasi thread FAISS. Paralelisasi OpenMP hanya terjadi pada pencarian batch
+        # (beberapa kueri sekaligus lewat search_documents), bukan pada kueri tunggal.
+        faiss.omp_set_num_threads(int(os.environ.get("FAISS_THREADS", os.cpu_count() or 1)))
+        
+        # Load vector store, warm up the embedding endpoint (so the first query does not
+        # pay the cold start) and create the generation model concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            store_future = executor.submit(self.load_vector_store)
+            warm_up_future = executor.submit(self._warm_up_embeddings)
+            model_future = executor.submit(
+                genai.GenerativeModel,
+                model_name=self.generation_model,
+                generation_config={
+                    "temperature": 0.2,
+                    "top_p": 0.8,
+                    "top_k": 40,
+                    "max_output_tokens": 2048,
+                }
+            )
+            
+            store_future.result()
+            self._warm_up_index()
+            warm_up_future.result()
+            self.model = model_future.result()
+        
+        # Cache embedding kueri di disk agar kueri berulang tidak memanggil API lagi.
+        # Dibuka setelah vector store tervalidasi; urutan LRU disimpan di memori.
+        self._emb_cache = shelve.open(os.path.join(os.path.dirname(vector_store_path), "emb_cache"))
+        self._emb_cache_order = OrderedDict.fromkeys(self._emb_cache.keys())
+        atexit.register(self.close)
+        
+        # Register function calls and expose them as native Gemini tools
         self.registered_functions = self._register_functions()
+        self.tools = self._build_tools()
     
     def load_vector_store(self):
         """Load the vector store"""
         if not os.path.exists(f"{self.vector_store_path}.index"):
             raise FileNotFoundError(f"Vector store not found at {self.vector_store_path}.index")
         
-        if not os.path.exists(f"{self.vector_store_path}.pkl"):
-            raise FileNotFoundError(f"Vector store data not found at {self.vector_store_path}.pkl")
+        if not os.path.exists(f"{self.vector_store_path}.json") and not os.path.exists(f"{self.vector_store_path}.pkl"):
+            raise FileNotFoundError(f"Vector store data not found at {self.vector_store_path}.json")
         
         # Load the index
-        self.index = faiss.read_index(f"{self.vector_store_path}.index")
+        self.index = self._read_index(f"{self.vector_store_path}.index")
+        
+        # Search by cosine similarity on normalized vectors
+        self.index = self._ensure_inner_product(self.index)
+        
+        # Replace a large flat index with an approximate one; an explicit "Flat" stays exact.
+        # fp16 storage is available explicitly with index_desc="SQfp16".
+        self.index = self._load_ann_index(self.index)
+        self._apply_search_params()
+        
+        # Keep the CPU index for write_index, search on a GPU clone if requested
+        self._cpu_index = self.index
+        self.index = self._maybe_to_gpu(self.index)
+        
+        # Stored vectors for exact re-ranking of approximate (IVF/HNSW) results
+        self._rerank_vectors = self._load_rerank_vectors()
         
         # Load the documents
-        with open(f"{self.vector_store_path}.pkl", "rb") as f:
-            data = pickle.load(f)
+        if os.path.exists(f"{self.vector_store_path}.json"):
+            # Columnar store: JSON document metadata, npz index columns, memory-mapped text blobs
+            with open(f"{self.vector_store_path}.json", encoding="utf-8") as f:
+                self.documents = json.load(f)["documents"]
+            with np.load(f"{self.vector_store_path}.meta.npz") as meta:
+                self._chunk_doc_idx = meta["doc_idx"]
+                self._chunk_idx = meta["chunk_idx"]
+            self._chunk_texts = TextBlob(f"{self.vector_store_path}.chunks")
+            self._doc_texts = TextBlob(f"{self.vector_store_path}.docs")
+        else:
+            # Older stores pickle every chunk dict (and document text)
+            with open(f"{self.vector_store_path}.pkl", "rb") as f:
+                data = pickle.load(f)
             self.documents = data["documents"]
-            self.chunks_info = data["chunks_info"]
+            chunks_info = data["chunks_info"]
+            self._chunk_texts = [chunk["text"] for chunk in chunks_info]
+            self._chunk_doc_idx = np.array([chunk["doc_idx"] for chunk in chunks_info], dtype=np.int32)
+            self._chunk_idx = np.array([chunk["chunk_idx"] for chunk in chunks_info], dtype=np.int32)
+            self._doc_texts = [doc["text"] for doc in self.documents]
+        
+        # Index dokumen berdasarkan ID untuk lookup O(1)
+        self._doc_idx_by_id = {doc["id"]: i for i, doc in enumerate(self.documents)}
+        
+        # Dokumen tidak berubah saat runtime, jadi daftar dokumen dihitung sekali
+        self._doc_list_cache = {
+            "status": "success",
+            "count": len(self.documents),
+            "documents": [
+                {
+                    "id": doc["id"],
+                    "source": doc["source"],
+                    "size": doc["size"] if "size" in doc else len(doc["text"]),
+                    "chunks": doc.get("chunks_count", 0)
+                }
+                for doc in self.documents
+            ]
+        }
         
-        console.print(f"Vector store berhasil dimuat: {len(self.chunks_info)} chunks dari {len(self.documents)} dokumen")
+        console.print(f"Vector store berhasil dimuat: {len(self._chunk_texts)} chunks dari {len(self.documents)} dokumen")
+    
+    def _get_chunks(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize chunk dicts only for the given row indices"""
+        return [
+            {
+                "doc_id": self.documents[doc_idx]["id"],
+                "chunk_idx": chunk_idx,
+                "text": self._chunk_texts[idx]
+            }
+            for idx, doc_idx, chunk_idx in zip(
+                indices.tolist(),
+                self._chunk_doc_idx[indices].tolist(),
+                self._chunk_idx[indices].tolist()
+            )
+        ]
+    
+    def _read_index(self, path: str):
+        """Read a FAISS index memory-mapped and read-only, falling back to a normal read"""
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Older index formats (or builds) cannot be memory-mapped
+            return faiss.read_index(path)
+    
+    def _ensure_inner_product(self, index):
+        """Convert an L2 flat index to a normalized inner-product index, cached as a derived file"""
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT or not isinstance(index, faiss.IndexFlat):
+            return index
+        
+        # The git-tracked {path}.index is left untouched; the converted copy lives in {path}.ip.index
+        ip_path = f"{self.vector_store_path}.ip.index"
+        if os.path.exists(ip_path) and os.path.getmtime(ip_path) >= os.path.getmtime(f"{self.vector_store_path}.index"):
+            return self._read_index(ip_path)
+        
+        console.print("Mengonversi index ke inner product (cosine)...")
+        xb = index.reconstruct_n(0, index.ntotal)
+        faiss.normalize_L2(xb)
+        ip_index = faiss.IndexFlatIP(index.d)
+        ip_index.add(xb)
+        
+        # Write to a temporary file first: an older derived index may still be memory-mapped
+        faiss.write_index(ip_index, f"{ip_path}.tmp")
+        os.replace(f"{ip_path}.tmp", ip_path)
+        
+        return ip_index
+    
+    def _ann_index_desc(self, n: int, d: int) -> str:
+        """Choose the index_factory string for n vectors of dimension d"""
+        if self.index_desc:
+            return self.index_desc
+        
+        # nlist ~ 4*sqrt(N), PQ with one sub-quantizer per 4 dimensions
+        nlist = int(4 * np.sqrt(n))
+        return f"IVF{nlist},PQ{d // 4}"
+    
+    def _load_ann_index(self, index):
+        """Build (or load a previously built) approximate index when the stored index is flat"""
+        if self.index_desc == "Flat" or not isinstance(index, faiss.IndexFlat) or index.ntotal < ANN_MIN_VECTORS:
+            return index
+        
+        return self._build_derived_index(index, self._ann_index_desc(index.ntotal, index.d))
+    
+    def _build_derived_index(self, index, desc: str):
+        """Build an index_factory index from the vectors of a flat index, cached next to the vector store"""
+        # The built index is cached next to the vector store, keyed by its description
+        path = f"{self.vector_store_path}.{re.sub(r'[^A-Za-z0-9]+', '_', desc)}.index"
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(f"{self.vector_store_path}.index"):
+            return self._read_index(path)
+        
+        console.print(f"Membangun index {desc} untuk {index.ntotal} vektor...")
+        xb = index.reconstruct_n(0, index.ntotal)
+        derived = faiss.index_factory(index.d, desc, index.metric_type)
+        derived.train(xb)
+        derived.add(xb)
+        faiss.write_index(derived, path)
+        
+        return derived
+    
+    def _apply_search_params(self):
+        """Apply search-time parameters (nprobe, efSearch) to the loaded index"""
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+        
+        if isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = self.ef_search
+    
+    def _load_rerank_vectors(self) -> Optional[np.ndarray]:
+        """Memory-map the stored embeddings when the index is approximate"""
+        vectors_path = f"{self.vector_store_path}.vectors.npy"
+        if not os.path.exists(vectors_path) or not isinstance(self._cpu_index, (faiss.IndexIVF, faiss.IndexHNSW)):
+            return None
+        
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if vectors.shape[0] != self._cpu_index.ntotal:
+            return None
+        
+        # Compile the re-ranker now rather than on the first query
+        _rerank(np.zeros(vectors.shape[1], dtype='float32'), np.zeros((1, vectors.shape[1]), dtype='float32'), np.empty(1, dtype='float32'))
+        return vectors
+    
+    def _rerank_candidates(self, query_vectors: np.ndarray, indices: np.ndarray, top_k: int):
+        """Re-score candidates with exact cosine similarity and keep the best top_k per query"""
+        distances = np.full((len(query_vectors), top_k), -np.inf, dtype='float32')
+        reranked = np.full((len(query_vectors), top_k), -1, dtype='int64')
+        
+        for row, (query, candidates) in enumerate(zip(query_vectors, indices)):
+            candidates = candidates[candidates != -1]
+            scores = np.empty(len(candidates), dtype='float32')
+            _rerank(query, np.ascontiguousarray(self._rerank_vectors[candidates], dtype='float32'), scores)
+            
+            order = np.argsort(-scores)[:top_k]
+            distances[row, :len(order)] = scores[order]
+            reranked[row, :len(order)] = candidates[order]
+        
+        return distances, reranked
+    
+    def _maybe_to_gpu(self, index):
+        """Clone the index to GPU 0 when enabled, a GPU is available and the index is large enough"""
+        if not self.use_gpu or index.ntotal < GPU_MIN_VECTORS:
+            return index
+        
+        if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+            console.print("GPU tidak tersedia, index tetap di CPU")
+            return index
+        
+        self._gpu_resources = faiss.StandardGpuResources()
+        return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
     
     def _register_functions(self) -> Dict[str, Dict[str, Any]]:
         """Register available functions for the model to call"""
         functions = {
             "search_documents": {
-                "function": self.search_documents,
+                "function": self._search_single,
                 "description": "Mencari dokumen yang relevan dengan kueri",
-                "parameters": ["query", "top_k"]
+                "param_types": {"query": str, "top_k": int}
             },
             "get_current_time": {
                 "function": self.get_current_time,
                 "description": "Mendapatkan waktu dan tanggal saat ini",
-                "parameters": []
+                "param_types": {}
             },
             "open_browser": {
                 "function": self.open_browser,
                 "description": "Membuka browser dengan URL yang ditentukan",
-                "parameters": ["url"]
+                "param_types": {"url": str}
             },
             "summarize_document": {
                 "function": self.summarize_document,
                 "description": "Meringkas dokumen tertentu",
-                "parameters": ["doc_id"]
+                "param_types": {"doc_id": str}
             },
             "list_available_documents": {
                 "function": self.list_available_documents,
                 "description": "Menampilkan daftar dokumen yang tersedia",
-                "parameters": []
+                "param_types": {}
             }
         }
         
         return functions
     
-    def search_documents(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Query the vector store and return the top k relevant chunks"""
-        # Create embedding for the query
-        query_embedding = genai.embed_content(
-            model=self.embedding_model,
-            content=query,
-            task_type="retrieval_query"
-        )
-        
-        # Convert to numpy array
-        query_vector = np.array([query_embedding["embedding"]]).astype('float32')
-        
-        # Search the index
-        distances, indices = self.index.search(query_vector, top_k)
-        
-        # Gather results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1:  # -1 means no result
-                chunk_info = self.chunks_info[idx]
-                results.append({
+    def _build_tools(self) -> List[Any]:
+        """Build Gemini function declarations for the registered functions"""
+        declarations = []
+        for name, info in self.registered_functions.items():
+            parameters = None
+            if info["param_types"]:
+                parameters = {
+                    "type": "object",
+                    "properties": {
+                        param: {"type": _SCHEMA_TYPES[param_type]}
+                        for param, param_type in info["param_types"].items()
+                    }
+                }
+            
+            declarations.append(genai.types.CallableFunctionDeclaration(
+                name=name,
+                description=info["description"],
+                parameters=parameters,
+                function=self._make_tool_function(name)
+            ))
+        
+        return [genai.types.Tool(function_declarations=declarations)]
+    
+    def _make_tool_function(self, function_name: str) -> Callable[..., Any]:
+        """Wrap execute_function so the SDK can call it with keyword arguments"""
+        def call(**kwargs):
+            console.print(f"Eksekusi fungsi: {function_name}")
+            return self.execute_function(function_name, kwargs)
+        
+        return call
+    
+    def search_documents(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Query the vector store with a batch of queries and return the top k chunks per query"""
+        query_vectors = self._embed_queries(queries)
+        faiss.normalize_L2(query_vectors)
+        
+        # Search the index once for all queries; approximate indexes over-fetch for re-ranking
+        if self._rerank_vectors is None:
+            distances, indices = self.index.search(query_vectors, top_k)
+        else:
+            _, candidates = self.index.search(query_vectors, top_k * RERANK_FACTOR)
+            distances, indices = self._rerank_candidates(query_vectors, candidates, top_k)
+        
+        # Gather results per query
+        batch_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            mask = row_indices != -1  # -1 means no result
+            scores = row_distances[mask].tolist()
+            chunks = self._get_chunks(row_indices[mask])
+            batch_results.append([
+                {
                     "id": chunk_info["doc_id"],
                     "chunk_idx": chunk_info["chunk_idx"],
                     "text": chunk_info["text"],
-                    "score": float(distances[0][i])
-                })
+                    "score": score
+                }
+                for chunk_info, score in zip(chunks, scores)
+            ])
         
-        return results
+        return batch_results
+    
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries as an (nq, d) float32 matrix, using the on-disk cache where possible"""
+        keys = [hashlib.sha1(f"{self.embedding_model}\0{query}".encode("utf-8")).hexdigest() for query in queries]
+        vectors: List[Optional[np.ndarray]] = [None] * len(queries)
+        missing = []
+        
+        for i, key in enumerate(keys):
+            cached = self._emb_cache.get(key)
+            if cached is not None:
+                vectors[i] = np.frombuffer(cached, dtype='float32')
+                self._emb_cache_order.move_to_end(key)
+            else:
+                missing.append(i)
+        
+        if missing:
+            # Create embeddings for all cache misses in a single request
+            response = self._client.models.embed_content(
+                model=self.embedding_model,
+                contents=[queries[i] for i in missing],
+                config=genai_types.EmbedContentConfig(task_type="RETRIEVAL_QUERY")
+            )
+            
+            for i, embedding in zip(missing, response.embeddings):
+                vector = np.asarray(embedding.values, dtype='float32')
+                self._emb_cache[keys[i]] = vector.tobytes()
+                self._emb_cache_order[keys[i]] = None
+                vectors[i] = vector
+            
+            # Buang entri yang paling lama tidak dipakai di atas batas
+            while len(self._emb_cache_order) > EMB_CACHE_MAX:
+                oldest, _ = self._emb_cache_order.popitem(last=False)
+                del self._emb_cache[oldest]
+            self._emb_cache.sync()
+        
+        # Stack into a contiguous (nq, d) matrix so FAISS can search the batch at once
+        return np.ascontiguousarray(np.stack(vectors), dtype='float32')
+    
+    def close(self):
+        """Close the on-disk embedding cache"""
+        cache = getattr(self, "_emb_cache", None)
+        if cache is not None:
+            cache.close()
+            self._emb_cache = None
+            atexit.unregister(self.close)
+    
+    def _warm_up_embeddings(self):
+        """Issue one embedding request to open the connection and resolve credentials"""
+        try:
+            self._client.models.embed_content(model=self.embedding_model, contents="warmup")
+        except Exception as e:
+            console.print(f"Warm-up embedding gagal: {str(e)}")
+    
+    def _warm_up_index(self):
+        """Run one dummy search to page in the memory-mapped index and prime lazy IVF/HNSW structures"""
+        if self.index.ntotal:
+            self.index.search(np.zeros((1, self.index.d), dtype='float32'), 1)
+    
+    def _search_single(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Search for a single query (used by function calling)"""
+        return self.search_documents([query], top_k)[0]
     
     def get_current_time(self) -> Dict[str, str]:
         """Get the current time and date"""
@@ -177,17 +554,14 @@ class SimpleRAG:
     def summarize_document(self, doc_id: str) -> Dict[str, Any]:
         """Summarize a specific document"""
         # Find the document
-        doc = None
-        for document in self.documents:
-            if document["id"] == doc_id:
-                doc = document
-                break
+        doc_idx = self._doc_idx_by_id.get(doc_id)
         
-        if not doc:
+        if doc_idx is None:
             return {"status": "error", "message": f"Dokumen dengan ID {doc_id} tidak ditemukan"}
         
         # Get the full text
-        full_text = doc["text"]
+        doc = self.documents[doc_idx]
+        full_text = self._doc_texts[doc_idx]
         
         # Summarize using Gemini
         try:
@@ -213,52 +587,7 @@ class SimpleRAG:
     
     def list_available_documents(self) -> Dict[str, Any]:
         """List all available documents"""
-        doc_list = []
-        for doc in self.documents:
-            doc_list.append({
-                "id": doc["id"],
-                "source": doc["source"],
-                "size": len(doc["text"]),
-                "chunks": doc.get("chunks_count", 0)
-            })
-        
-        return {
-            "status": "success",
-            "count": len(doc_list),
-            "documents": doc_list
-        }
-    
-    def parse_function_call(self, response_text: str) -> Dict[str, Any]:
-        """
-        Parse function calls from model response text
-        Returns a dict with function name and arguments if a function call is detected
-        """
-        # Look for function call patterns in the response
-        function_call_pattern = r'FUNCTION_CALL\[(.*?)\]\((.*?)\)'
-        matches = re.findall(function_call_pattern, response_text)
-        
-        if matches:
-            function_name, args_str = matches[0]
-            
-            # Try to parse args as comma-separated values
-            args = {}
-            if args_str:
-                arg_pairs = args_str.split(',')
-                for pair in arg_pairs:
-                    if ':' in pair:
-                        key, value = pair.split(':', 1)
-                        args[key.strip()] = value.strip()
-                    else:
-                        # Single argument without key
-                        args["value"] = pair.strip()
-            
-            return {
-                "detected": True,
-                "function": function_name.strip(),
-                "args": args
-            }
-        
-        return {"detected": False}
+        return self._doc_list_cache
     
     def execute_function(self, function_name: str, args: Dict[str, Any]) -> Any:
         """Execute a function by name with the provided arguments"""
@@ -268,50 +597,29 @@ class SimpleRAG:
         function_info = self.registered_functions[function_name]
         function_to_call = function_info["function"]
         
-        # Convert string args to proper types if needed
-        processed_args = {}
-        
-        # Only process parameters that are defined for this function
-        for param in function_info["parameters"]:
-            if param in args:
-                # Try to convert to int if it looks like a number
-                if args[param].isdigit():
-                    processed_args[param] = int(args[param])
-                else:
-                    processed_args[param] = args[param]
-        
-        # Call the function with the processed arguments
+        # Convert args to the declared types, ignoring parameters that are not declared
         try:
+            processed_args = {
+                param: param_type(args[param])
+                for param, param_type in function_info["param_types"].items()
+                if param in args
+            }
             return function_to_call(**processed_args)
         except Exception as e:
             return {"error": f"Error executing function: {str(e)}"}
     
-    def generate_response(self, query: str, context_chunks: List[Dict[str, Any]]) -> str:
-        """Generate a response based on the query and retrieved chunks"""
+    def generate_response(self, query: str, context_chunks: List[Dict[str, Any]], on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Generate a response based on the query and retrieved chunks, streaming text to on_text"""
         # Prepare context from chunks
         context = ""
         for i, chunk in enumerate(context_chunks):
             context += f"\nChunk {i+1} (dari {chunk['id']}):\n{chunk['text']}\n"
         
-        # List available functions for the model
-        function_descriptions = "\n".join([
-            f"- {name}: {info['description']} (Parameters: {', '.join(info['parameters'])})"
-            for name, info in self.registered_functions.items()
-        ])
-        
-        # Prepare prompt with functions
+        # Prepare prompt; functions are offered to the model as native tools
         prompt = f"""
         Berdasarkan informasi berikut, jawablah pertanyaan pengguna.
         Jika jawabannya tidak ada dalam informasi yang diberikan atau kamu perlu informasi tambahan,
-        kamu dapat menggunakan salah satu fungsi berikut dengan format FUNCTION_CALL[nama_fungsi](parameter1:nilai1, parameter2:nilai2).
-        
-        Fungsi yang tersedia:
-        {function_descriptions}
-        
-        Contoh penggunaan:
-        FUNCTION_CALL[search_documents](query:artificial intelligence, top_k:3)
-        FUNCTION_CALL[get_current_time]()
-        FUNCTION_CALL[open_browser](url:google.com)
+        kamu dapat memanggil salah satu fungsi yang tersedia.
         
         Informasi:
         {context}
@@ -321,46 +629,46 @@ class SimpleRAG:
         Jawaban:
         """
         
-        # Generate response
+        # Generate a streamed response. Automatic function calling does not support
+        # streaming, so requested functions are run here and the same chat continues.
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
+            chat = self.model.start_chat()
+            response = chat.send_message(prompt, tools=self.tools, stream=True)
+            response_text, function_calls = self._consume_stream(response, on_text)
             
-            # Check if there's a function call in the response
-            function_result = self.parse_function_call(response_text)
+            while function_calls:
+                parts = [
+                    genai.protos.Part(function_response=genai.protos.FunctionResponse(
+                        name=function_call.name,
+                        response={"result": self._make_tool_function(function_call.name)(**function_call.args)}
+                    ))
+                    for function_call in function_calls
+                ]
+                response = chat.send_message(parts, tools=self.tools, stream=True)
+                text, function_calls = self._consume_stream(response, on_text)
+                response_text += text
             
-            if function_result["detected"]:
-                function_name = function_result["function"]
-                args = function_result["args"]
-                
-                console.print(f"Eksekusi fungsi: {function_name}")
-                
-                # Execute the function
-                result = self.execute_function(function_name, args)
-                
-                # Format the result for display
-                result_str = json.dumps(result, indent=2, ensure_ascii=False)
-                
-                # Generate a new response with the function result
-                follow_up_prompt = f"""
-                Kamu telah memanggil fungsi {function_name} untuk pertanyaan: "{query}"
-                
-                Hasil dari fungsi tersebut adalah:
-                {result_str}
-                
-                Berdasarkan hasil tersebut dan konteks sebelumnya, berikan jawaban final untuk pengguna.
-                Jangan disebutkan bahwa kamu menggunakan fungsi, cukup berikan jawaban final saja.
-                """
-                
-                follow_up_response = self.model.generate_content(follow_up_prompt)
-                return follow_up_response.text
-            else:
-                # Just return the original response if no function call
-                return response_text
+            return response_text
                 
         except Exception as e:
             return f"Error saat menghasilkan respons: {str(e)}"
     
+    def _consume_stream(self, response, on_text: Optional[Callable[[str], None]]):
+        """Iterate a streamed response, forwarding text as it arrives and collecting function calls"""
+        text_parts = []
+        function_calls = []
+        
+        for chunk in response:
+            for part in chunk.parts:
+                if part.function_call.name:
+                    function_calls.append(part.function_call)
+                elif part.text:
+                    text_parts.append(part.text)
+                    if on_text:
+                        on_text(part.text)
+        
+        return "".join(text_parts), function_calls
+    
     def run_cli(self):
         """Run the CLI interface"""
         if RICH_AVAILABLE:
@@ -374,66 +682,114 @@ class SimpleRAG:
             console.print("=" * 50)
             console.print("Ketik 'exit' atau 'quit' untuk keluar\n")
         
+        lines = self._start_input_reader()
+        
         while True:
-            query = console.input("\nMasukkan pertanyaan Anda: ")
-            
-            if query.lower() in ['exit', 'quit']:
-                console.print("\nTerima kasih telah menggunakan aplikasi ini!")
-                break
-            
-            if not query.strip():
-                continue
-            
-            # Retrieve relevant chunks
-            console.print("Mencari informasi relevan...")
-            results = self.search_documents(query)
+            console.print("\nMasukkan pertanyaan Anda: ")
+            queries = self._collect_queries(lines)
             
-            if not results:
-                console.print("Tidak ditemukan informasi yang relevan.")
-                # Still generate a response but without context
-                results = []
+            # Stop at the first exit command, but still answer the queries before it
+            exit_requested = False
+            for i, query in enumerate(queries):
+                if query.lower() in ['exit', 'quit']:
+                    queries = queries[:i]
+                    exit_requested = True
+                    break
             
-            # Generate response
-            console.print("Menghasilkan respons...")
-            response = self.generate_response(query, results)
+            queries = [query for query in queries if query.strip()]
             
-            # Display response
-            if RICH_AVAILABLE:
-                console.print(Panel(
-                    Markdown(response),
-                    title="JAWABAN",
-                    expand=False
-                ))
-            else:
-                console.print("\n" + "=" * 50)
-                console.print("JAWABAN:")
-                console.print(response)
-                console.print("=" * 50)
+            if queries:
+                # Retrieve relevant chunks for all pending queries in one batch
+                console.print("Mencari informasi relevan...")
+                batch_results = self.search_documents(queries)
+                
+                for query, results in zip(queries, batch_results):
+                    self._answer_query(query, results, lines)
             
-            # Ask if user wants to see sources
-            if results:
-                show_sources = console.input("\nIngin melihat sumber? (y/n): ").lower()
-                if show_sources == 'y':
-                    console.print("\nSUMBER INFORMASI:")
-                    for i, chunk in enumerate(results):
-                        if RICH_AVAILABLE:
-                            console.print(Panel(
-                                f"{chunk['text'][:300]}...",
-                                title=f"Sumber {i+1}: {chunk['id']} (Score: {chunk['score']:.4f})",
-                                expand=False
-                            ))
-                        else:
-                            console.print(f"\n--- Sumber {i+1}: {chunk['id']} ---")
-                            console.print(f"Score: {chunk['score']:.4f}")
-                            console.print(chunk['text'][:200] + "...")
+            if exit_requested:
+                console.print("\nTerima kasih telah menggunakan aplikasi ini!")
+                break
+    
+    def _start_input_reader(self) -> "queue.Queue[str]":
+        """Read stdin lines in a background thread so pending queries can be batched"""
+        lines = queue.Queue()
+        
+        def reader():
+            while True:
+                try:
+                    lines.put(input())
+                except EOFError:
+                    lines.put("exit")
+                    break
+        
+        threading.Thread(target=reader, daemon=True).start()
+        return lines
+    
+    def _collect_queries(self, lines: "queue.Queue[str]", window: float = QUERY_BATCH_WINDOW) -> List[str]:
+        """Wait for one query, then gather any others arriving within the batch window"""
+        queries = [lines.get()]
+        deadline = time.monotonic() + window
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                queries.append(lines.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return queries
+    
+    def _answer_query(self, query: str, results: List[Dict[str, Any]], lines: "queue.Queue[str]"):
+        """Generate, display and optionally show sources for a single query"""
+        if not results:
+            console.print("Tidak ditemukan informasi yang relevan.")
+            # Still generate a response but without context
+            results = []
+        
+        # Stream the response as it is generated
+        console.print("\nJAWABAN:")
+        streamed = []
+        
+        def show(text: str):
+            streamed.append(text)
+            print(text, end="", flush=True)
+        
+        response = self.generate_response(query, results, on_text=show)
+        if not streamed:
+            # Nothing was streamed, e.g. an error message
+            console.print(response)
+        print()
+        
+        # Ask if user wants to see sources
+        if results:
+            console.print("\nIngin melihat sumber? (y/n): ")
+            show_sources = lines.get().lower()
+            if show_sources == 'y':
+                console.print("\nSUMBER INFORMASI:")
+                for i, chunk in enumerate(results):
+                    if RICH_AVAILABLE:
+                        console.print(Panel(
+                            f"{chunk['text'][:300]}...",
+                            title=f"Sumber {i+1}: {chunk['id']} (Score: {chunk['score']:.4f})",
+                            expand=False
+                        ))
+                    else:
+                        console.print(f"\n--- Sumber {i+1}: {chunk['id']} ---")
+                        console.print(f"Score: {chunk['score']:.4f}")
+                        console.print(chunk['text'][:200] + "...")
 
 if __name__ == "__main__":
     try:
         rag = SimpleRAG()
-        rag.run_cli()
+        try:
+            rag.run_cli()
+        finally:
+            rag.close()
     except FileNotFoundError as e:
         console.print(f"Error: {str(e)}")
-        console.print("\nPastikan file vector store (.index dan .pkl) tersedia di folder data/")
+        console.print("\nPastikan file vector store (.index dan .json) tersedia di folder data/")
         console.print("Jalankan train.py terlebih dahulu untuk membuat vector store.")
     except Exception as e:
         console.print(f"Error: {str(e)}")
\ No newline at end of file
@@ -4,82 +4,178 @@
 import os
 import glob
 import zipfile
-import pickle
+import json
 import numpy as np
 import faiss
 import google.generativeai as genai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pypdf import PdfReader
 from tqdm import tqdm
 import argparse
+import functools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# tiktoken opsional: jika tersedia, dokumen dipotong berdasarkan jumlah token
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# blake3 opsional untuk hash konten chunk; fallback ke blake2b dari hashlib
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    import hashlib
+    BLAKE3_AVAILABLE = False
+
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+def _retry_after_seconds(error: Exception) -> float:
+    """Read a Retry-After header (in seconds) from an API error, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _is_transient(error: Exception) -> bool:
+    """True for rate limits (429), server errors (5xx) and network errors worth retrying"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # google.api_core exceptions expose the HTTP status as .code; requests-style errors via .response
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+def retry_with_backoff(max_retries: int = 5, base_delay: float = 1.0):
+    """Retry transient failures with exponential backoff and jitter, honouring Retry-After"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_retries):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_retries - 1 or not _is_transient(e):
+                        raise
+                    delay = _retry_after_seconds(e) or base_delay * (2 ** attempt)
+                    time.sleep(delay + random.uniform(0, 0.5))
+        return wrapper
+    return decorator
+
+# Di bawah jumlah vektor ini index Flat (exact) dipakai pada mode "auto"
+IVFPQ_MIN_VECTORS = 10_000
+
 class DocumentProcessor:
-    def __init__(self, data_dir: str = "data/sample_docs"):
+    def __init__(self, data_dir: str = "data/sample_docs", chunk_size: int = 1000, chunk_tokens: int = 1800, chunk_overlap: int = 128):
         self.data_dir = data_dir
         self.documents = []
         self.embeddings = []
         self.chunks_info = []
         self.embedding_model = "models/text-embedding-004"  # Latest embedding model
         
+        # Chunking: by tokens when tiktoken is available, otherwise by UTF-8 bytes.
+        # cl100k_base only approximates Gemini's tokenizer, so stay below the 2048-token input limit.
+        self.chunk_size = chunk_size
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
     
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _load_tokenizer():
+        """Load the cl100k_base encoding once per process, or None to fall back to byte chunking"""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        
+        try:
+            # The encoding file is downloaded on first use
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"Tokenizer unavailable, chunking by bytes instead: {str(e)}")
+            return None
+    
     def load_documents(self) -> List[Dict[str, Any]]:
         """Load documents from the data directory"""
         # Look for PDF files in the data directory
         pdf_files = glob.glob(os.path.join(self.data_dir, "*.pdf"))
         
         documents = []
-        for pdf_file in tqdm(pdf_files, desc="Processing PDFs"):
-            document = self._process_pdf(pdf_file)
-            documents.append(document)
+        
+        # PDF text extraction is CPU-bound Python, so it runs in separate processes;
+        # each worker chunks its PDF page by page and returns only the chunks
+        if pdf_files:
+            process_pdf = functools.partial(
+                DocumentProcessor._process_pdf,
+                chunk_size=self.chunk_size,
+                chunk_tokens=self.chunk_tokens,
+                chunk_overlap=self.chunk_overlap
+            )
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                documents.extend(tqdm(
+                    executor.map(process_pdf, pdf_files, chunksize=4),
+                    total=len(pdf_files),
+                    desc="Processing PDFs"
+                ))
             
         # Look for text files in the data directory
         txt_files = glob.glob(os.path.join(self.data_dir, "*.txt"))
         
-        for txt_file in tqdm(txt_files, desc="Processing TXTs"):
-            document = self._process_txt(txt_file)
-            documents.append(document)
-        
         # Look for markdown files in the data directory
         md_files = glob.glob(os.path.join(self.data_dir, "*.md"))
         
-        for md_file in tqdm(md_files, desc="Processing MDs"):
-            document = self._process_md(md_file)
-            documents.append(document)
+        # Plain file reads are I/O-bound, so threads are enough
+        with ThreadPoolExecutor() as executor:
+            documents.extend(tqdm(executor.map(DocumentProcessor._process_txt, txt_files), total=len(txt_files), desc="Processing TXTs"))
+            documents.extend(tqdm(executor.map(DocumentProcessor._process_md, md_files), total=len(md_files), desc="Processing MDs"))
         
         self.documents = documents
         print(f"Total documents processed: {len(documents)}")
         return documents
     
-    def _process_pdf(self, file_path: str) -> Dict[str, Any]:
-        """Process a PDF file and extract text"""
+    @staticmethod
+    def _process_pdf(file_path: str, chunk_size: int, chunk_tokens: int, chunk_overlap: int) -> Dict[str, Any]:
+        """Chunk a PDF page by page; the document text is never joined into one string"""
+        pages = DocumentProcessor._iter_pdf_pages(file_path)
+        return {
+            "id": os.path.basename(file_path),
+            "source": file_path,
+            "type": "pdf",
+            # Consumed by create_embeddings; the text is streamed again from the file when saving
+            "chunks": list(DocumentProcessor._chunk_stream(pages, chunk_size, chunk_tokens, chunk_overlap))
+        }
+    
+    @staticmethod
+    def _iter_pdf_pages(file_path: str) -> Iterator[str]:
+        """Yield the text of each PDF page, one page at a time"""
         try:
             reader = PdfReader(file_path)
-            text = ""
             for page in reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return {
-                "id": os.path.basename(file_path),
-                "source": file_path,
-                "text": text,
-                "type": "pdf"
-            }
+                yield page.extract_text() + "\n"
         except Exception as e:
             print(f"Error processing PDF {file_path}: {str(e)}")
-            return {
-                "id": os.path.basename(file_path),
-                "source": file_path,
-                "text": f"Error processing document: {str(e)}",
-                "type": "pdf"
-            }
+            yield f"Error processing document: {str(e)}"
     
-    def _process_txt(self, file_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def _iter_document_text(doc: Dict[str, Any]) -> Iterator[str]:
+        """Yield the text of a document in parts (pages for PDFs, the whole text otherwise)"""
+        if "text" in doc:
+            yield doc["text"]
+        else:
+            yield from DocumentProcessor._iter_pdf_pages(doc["source"])
+    
+    @staticmethod
+    def _process_txt(file_path: str) -> Dict[str, Any]:
         """Process a text file"""
         try:
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
@@ -100,7 +196,8 @@ class DocumentProcessor:
                 "type": "txt"
             }
     
-    def _process_md(self, file_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def _process_md(file_path: str) -> Dict[str, Any]:
         """Process a markdown file"""
         try:
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
@@ -121,54 +218,188 @@ class DocumentProcessor:
                 "type": "md"
             }
     
-    def _chunk_text(self, text: str, chunk_size: int = 1000) -> List[str]:
-        """Split text into chunks of specified size"""
-        return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    def _chunk_text(self, text: str) -> List[str]:
+        """Split text into overlapping token windows, or byte chunks without a tokenizer"""
+        return list(self._chunk_stream([text], self.chunk_size, self.chunk_tokens, self.chunk_overlap))
+    
+    @staticmethod
+    def _chunk_stream(parts: Iterable[str], chunk_size: int, chunk_tokens: int, chunk_overlap: int) -> Iterator[str]:
+        """Chunk text arriving in parts (e.g. PDF pages), holding at most one window plus one part"""
+        tokenizer = DocumentProcessor._load_tokenizer()
+        if tokenizer is None:
+            yield from DocumentProcessor._chunk_bytes_stream(parts, chunk_size)
+            return
+        
+        # Rolling token window: the last chunk_overlap tokens carry over into the next window,
+        # also across part boundaries
+        step = chunk_tokens - chunk_overlap
+        tokens: List[int] = []
+        emitted = False
+        for part in parts:
+            tokens.extend(tokenizer.encode(part, disallowed_special=()))
+            while len(tokens) >= chunk_tokens:
+                yield tokenizer.decode(tokens[:chunk_tokens])
+                del tokens[:step]
+                emitted = True
+        
+        # The remainder is a chunk unless it only repeats the overlap of the previous window
+        if len(tokens) > (chunk_overlap if emitted else 0):
+            yield tokenizer.decode(tokens)
+    
+    @staticmethod
+    def _chunk_bytes_stream(parts: Iterable[str], chunk_size: int) -> Iterator[str]:
+        """Split text arriving in parts into chunks of ~chunk_size UTF-8 bytes"""
+        # pending always starts on a chunk boundary; offset is its position in the whole text
+        pending, offset = b"", 0
+        for part in parts:
+            pending += part.encode("utf-8")
+            if len(pending) > chunk_size:
+                chunks, tail_start = DocumentProcessor._split_bytes(pending, chunk_size, offset)
+                yield from chunks
+                pending, offset = pending[tail_start:], offset + tail_start
+        if pending:
+            yield pending.decode("utf-8")
     
-    def create_embeddings(self) -> List[List[float]]:
-        """Create embeddings for all documents"""
+    @staticmethod
+    def _split_bytes(data: bytes, chunk_size: int, offset: int = 0) -> Tuple[List[str], int]:
+        """Split data (starting at byte offset of the whole text) on the chunk_size grid of the whole text,
+        never splitting a character; returns the complete chunks and where the last, unfinished one starts"""
+        # All chunk boundaries at once; move each back onto a character start
+        # (UTF-8 continuation bytes look like 10xxxxxx, at most 3 in a row)
+        codes = np.frombuffer(data, dtype=np.uint8)
+        starts = np.append(0, np.arange(-offset % chunk_size, len(data), chunk_size))
+        for _ in range(3):
+            starts = np.where((codes[starts] & 0xC0) == 0x80, starts - 1, starts)
+        bounds = np.unique(starts).tolist()
+        
+        chunks = [data[start:end].decode("utf-8") for start, end in zip(bounds[:-1], bounds[1:])]
+        return chunks, bounds[-1]
+    
+    def create_embeddings(self, batch_size: int = 100, max_workers: int = 5, cache_path: Optional[str] = None) -> List[List[float]]:
+        """Create embeddings for all documents, reusing cached embeddings of unchanged chunks"""
         if not self.documents:
             self.load_documents()
         
-        embeddings = []
-        chunks_info = []  # To store chunk information
-        
-        for doc_idx, doc in enumerate(tqdm(self.documents, desc="Creating embeddings")):
-            # Chunk document if it's too large
-            chunks = self._chunk_text(doc["text"])
+        # Chunk all documents first so chunks can be embedded in batches
+        all_chunks = []  # (doc_idx, chunk_idx, text)
+        for doc_idx, doc in enumerate(self.documents):
+            # PDFs arrive already chunked page by page; other documents are chunked here
+            chunks = doc.pop("chunks", None)
+            if chunks is None:
+                chunks = self._chunk_text(doc["text"])
+            all_chunks.extend((doc_idx, chunk_idx, chunk) for chunk_idx, chunk in enumerate(chunks))
             
-            for chunk_idx, chunk in enumerate(chunks):
-                try:
-                    embedding = genai.embed_content(
-                        model=self.embedding_model,
-                        content=chunk,
-                        task_type="retrieval_document"
-                    )
-                    embeddings.append(embedding["embedding"])
-                    
-                    # Save chunk information for better retrieval
-                    chunks_info.append({
-                        "doc_idx": doc_idx,
-                        "doc_id": doc["id"],
-                        "doc_type": doc["type"],
-                        "chunk_idx": chunk_idx,
-                        "text": chunk
-                    })
-                except Exception as e:
-                    print(f"Error on document {doc['id']}, chunk {chunk_idx}: {str(e)}")
-                    continue
-        
             # For document metadata
             doc["chunks_count"] = len(chunks)
         
-        # Save all embeddings as list
-        self.embeddings = embeddings
-        self.chunks_info = chunks_info
+        # Reuse embeddings of chunks whose content is unchanged since the last build;
+        # results stay in chunk order
+        hashes = [self._chunk_hash(chunk) for _, _, chunk in all_chunks]
+        cached = self._load_embedding_cache(cache_path)
+        embeddings = [cached.get(chunk_hash) for chunk_hash in hashes]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if cached:
+            print(f"Reusing {len(all_chunks) - len(missing)} cached embeddings, embedding {len(missing)} chunks")
+        
+        # Requests are network-bound, so several batches are kept in flight at once
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for start in range(0, len(missing), batch_size):
+                # Small jitter between submissions to avoid bursts of 429s
+                time.sleep(random.uniform(0, 0.05))
+                batch = [all_chunks[i] for i in missing[start:start + batch_size]]
+                futures[executor.submit(self._embed_batch, batch)] = start
+            
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Creating embeddings"):
+                start = futures[future]
+                for offset, embedding in enumerate(future.result()):
+                    embeddings[missing[start + offset]] = embedding
+        
+        self._save_embedding_cache(cache_path, hashes, embeddings)
+        
+        # Keep only chunks that were embedded successfully
+        self.embeddings = []
+        self.chunks_info = []  # To store chunk information
+        for (doc_idx, chunk_idx, chunk), embedding in zip(all_chunks, embeddings):
+            if embedding is None:
+                continue
+            
+            doc = self.documents[doc_idx]
+            self.embeddings.append(embedding)
+            
+            # Save chunk information for better retrieval
+            self.chunks_info.append({
+                "doc_idx": doc_idx,
+                "doc_id": doc["id"],
+                "doc_type": doc["type"],
+                "chunk_idx": chunk_idx,
+                "text": chunk
+            })
         
         print(f"Total chunks with embeddings: {len(self.embeddings)}")
         return self.embeddings
     
-    def save_to_vector_store(self, vector_store_path: str = "data/vector_store"):
+    def _chunk_hash(self, text: str) -> bytes:
+        """16-byte content hash of a chunk, keyed by the embedding model"""
+        data = f"{self.embedding_model}\0{text}".encode("utf-8")
+        if BLAKE3_AVAILABLE:
+            return blake3(data).digest(length=16)
+        return hashlib.blake2b(data, digest_size=16).digest()
+    
+    def _load_embedding_cache(self, cache_path: Optional[str]) -> Dict[bytes, np.ndarray]:
+        """Load the hash -> embedding mapping of the previous build"""
+        if not cache_path or not os.path.exists(cache_path):
+            return {}
+        
+        with np.load(cache_path) as data:
+            return {row.tobytes(): vector for row, vector in zip(data["hashes"], data["vectors"])}
+    
+    def _save_embedding_cache(self, cache_path: Optional[str], hashes: List[bytes], embeddings: List[Any]):
+        """Persist the hash -> embedding mapping of the current chunks"""
+        if not cache_path:
+            return
+        
+        kept = [(chunk_hash, embedding) for chunk_hash, embedding in zip(hashes, embeddings) if embedding is not None]
+        if not kept:
+            return
+        
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        np.savez(
+            cache_path,
+            # Raw digests as uint8 rows (fixed-width bytes dtypes drop trailing NULs)
+            hashes=np.frombuffer(b"".join(chunk_hash for chunk_hash, _ in kept), dtype=np.uint8).reshape(len(kept), -1),
+            vectors=np.array([embedding for _, embedding in kept], dtype=np.float32)
+        )
+    
+    def _embed_batch(self, batch: List[tuple]) -> List[Any]:
+        """Embed a batch of (doc_idx, chunk_idx, text) in one request; None marks a failed chunk"""
+        try:
+            return self._embed_request([text for _, _, text in batch])
+        except Exception as e:
+            print(f"Error on batch of {len(batch)} chunks, retrying one by one: {str(e)}")
+        
+        # Fall back to per-chunk requests for the failed batch only
+        embeddings = []
+        for doc_idx, chunk_idx, text in batch:
+            try:
+                embeddings.append(self._embed_request(text))
+            except Exception as e:
+                print(f"Error on document {self.documents[doc_idx]['id']}, chunk {chunk_idx}: {str(e)}")
+                embeddings.append(None)
+        
+        return embeddings
+    
+    @retry_with_backoff()
+    def _embed_request(self, content):
+        """Call the embedding API for one text or a list of texts"""
+        result = genai.embed_content(
+            model=self.embedding_model,
+            content=content,
+            task_type="retrieval_document"
+        )
+        return result["embedding"]
+    
+    def save_to_vector_store(self, vector_store_path: str = "data/vector_store", index_type: str = "auto"):
         """Save embeddings to a vector store"""
         # Check if we have any embeddings
         if not self.embeddings:
@@ -185,23 +416,92 @@ class DocumentProcessor:
         # Convert embeddings to numpy array
         embeddings_array = np.array(self.embeddings).astype('float32')
         
+        # Normalize so inner product equals cosine similarity
+        faiss.normalize_L2(embeddings_array)
+        
         # Create a FAISS index
-        dimension = len(self.embeddings[0])
-        index = faiss.IndexFlatL2(dimension)
-        index.add(embeddings_array)
+        index = self._build_index(embeddings_array, index_type)
         
         # Save the index
         faiss.write_index(index, f"{vector_store_path}.index")
         
-        # Save the documents and chunks info
-        with open(f"{vector_store_path}.pkl", "wb") as f:
+        # Keep the normalized embeddings at rest as fp16 (half the size of fp32)
+        np.save(f"{vector_store_path}.vectors.npy", embeddings_array.astype(np.float16))
+        
+        # Save chunk and document texts as memory-mappable blobs, never unpickled at load time
+        self._save_text_blob(f"{vector_store_path}.chunks", ([chunk["text"]] for chunk in self.chunks_info))
+        # PDF texts are re-extracted page by page while writing, so no document is held whole
+        doc_sizes = self._save_text_blob(f"{vector_store_path}.docs", map(self._iter_document_text, self.documents))
+        
+        # Save the numeric chunk columns as int32 arrays
+        np.savez(
+            f"{vector_store_path}.meta.npz",
+            doc_idx=np.array([chunk["doc_idx"] for chunk in self.chunks_info], dtype=np.int32),
+            chunk_idx=np.array([chunk["chunk_idx"] for chunk in self.chunks_info], dtype=np.int32)
+        )
+        
+        # Save the document metadata (without text)
+        with open(f"{vector_store_path}.json", "w", encoding="utf-8") as f:
             data = {
-                "documents": self.documents,
-                "chunks_info": self.chunks_info
+                "documents": [
+                    {**{key: value for key, value in doc.items() if key != "text"}, "size": size}
+                    for doc, size in zip(self.documents, doc_sizes)
+                ]
             }
-            pickle.dump(data, f)
+            json.dump(data, f, ensure_ascii=False)
+        
+        print(f"Vector store saved to {vector_store_path}.index and {vector_store_path}.json")
+        print(f"Chunk texts saved to {vector_store_path}.chunks.bin")
+    
+    def _save_text_blob(self, path: str, texts: Iterable[Iterable[str]]) -> List[int]:
+        """Save texts, each given as an iterable of parts, as one UTF-8 blob plus an int64 offsets array; returns each text's length"""
+        offsets = [0]
+        sizes = []
+        with open(f"{path}.bin", "wb") as f:
+            for parts in texts:
+                end, size = offsets[-1], 0
+                for part in parts:
+                    data = part.encode("utf-8")
+                    f.write(data)
+                    end += len(data)
+                    size += len(part)
+                offsets.append(end)
+                sizes.append(size)
+        
+        np.save(f"{path}.offsets.npy", np.array(offsets, dtype=np.int64))
+        return sizes
+    
+    def _build_index(self, embeddings_array: np.ndarray, index_type: str = "auto"):
+        """Build an inner-product FAISS index: flat, fp16 scalar-quantized, IVF-PQ or HNSW"""
+        n, dimension = embeddings_array.shape
         
-        print(f"Vector store saved to {vector_store_path}.index and {vector_store_path}.pkl")
+        # Small corpora are searched (near-)exactly on fp16 codes; IVF-PQ needs enough vectors to train
+        if index_type == "auto":
+            index_type = "sq_fp16" if n < IVFPQ_MIN_VECTORS else "ivfpq"
+        
+        if index_type == "flat":
+            index = faiss.IndexFlatIP(dimension)
+        elif index_type == "sq_fp16":
+            # Brute-force scan over fp16 codes: half the memory bandwidth of a flat index
+            index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings_array)
+        elif index_type == "ivfpq":
+            # 8-bit sub-quantizers, one per 8 dimensions (96 bytes for a 768-d vector)
+            quantizer = faiss.IndexFlatIP(dimension)
+            nlist = int(4 * np.sqrt(n))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, dimension // 8, 8, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings_array)
+            # nprobe is saved with the index
+            index.nprobe = 16
+        elif index_type == "hnsw":
+            # HNSW graph index for sub-linear search
+            index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+        else:
+            raise ValueError(f"Unknown index type: {index_type}")
+        
+        index.add(embeddings_array)
+        return index
 
 def extract_zip_files(data_dir):
     """Extract any zip files in the data directory"""
@@ -220,9 +520,18 @@ def main():
     parser.add_argument("--data-dir", default="data/sample_docs", help="Directory containing documents")
     parser.add_argument("--output", default="data/vector_store", help="Path to save the vector store")
     parser.add_argument("--api-key", help="Google AI API key")
-    parser.add_argument("--chunk-size", type=int, default=1000, help="Size of text chunks for embedding")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Size of text chunks in bytes (without tiktoken)")
+    parser.add_argument("--chunk-tokens", type=int, default=1800, help="Size of text chunks in tokens (with tiktoken)")
+    parser.add_argument("--chunk-overlap", type=int, default=128, help="Overlapping tokens between chunks")
+    parser.add_argument("--batch-size", type=int, default=100, help="Number of chunks per embedding request")
+    parser.add_argument("--index-type", default="auto", choices=["auto", "flat", "sq_fp16", "ivfpq", "hnsw"], help="FAISS index type (auto: fp16 flat scan below 10k chunks, IVF-PQ above)")
+    parser.add_argument("--workers", type=int, default=5, help="Number of embedding requests in flight")
     args = parser.parse_args()
     
+    # The chunk window advances by chunk_tokens - chunk_overlap tokens, which must be positive
+    if args.chunk_overlap < 0 or args.chunk_tokens <= args.chunk_overlap:
+        parser.error("--chunk-tokens must be greater than --chunk-overlap (and the overlap cannot be negative)")
+    
     # Set up API key from arguments, environment variable, or prompt
     api_key = args.api_key or os.environ.get("GOOGLE_API_KEY")
     if not api_key:
@@ -234,14 +543,19 @@ def main():
     extract_zip_files(args.data_dir)
     
     # Initialize and run document processor
-    processor = DocumentProcessor(data_dir=args.data_dir)
+    processor = DocumentProcessor(
+        data_dir=args.data_dir,
+        chunk_size=args.chunk_size,
+        chunk_tokens=args.chunk_tokens,
+        chunk_overlap=args.chunk_overlap
+    )
     processor.load_documents()
-    processor.create_embeddings()
-    processor.save_to_vector_store(vector_store_path=args.output)
+    processor.create_embeddings(batch_size=args.batch_size, max_workers=args.workers, cache_path=f"{args.output}.embcache.npz")
+    processor.save_to_vector_store(vector_store_path=args.output, index_type=args.index_type)
     
     print("Process completed! Vector store files are available at:")
     print(f" - {args.output}.index")
-    print(f" - {args.output}.pkl")
+    print(f" - {args.output}.json")
     print(f"Document types processed: PDF, TXT, MD")
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import pyaudio
 import asyncio
+from collections import deque
 
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
@@ -7,12 +8,32 @@ SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 
+# Ring buffer frame mikrofon yang dipakai ulang (16-bit mono per frame)
+FRAME_BYTES = CHUNK_SIZE * 2
+RING_SLOTS = 32
+
 class AudioProcessor:
     def __init__(self):
         self.pya = pyaudio.PyAudio()
+        # Slot dikirim lewat queue sebagai indeks; deque aman dipakai lintas thread
+        self._buffers = [bytearray(FRAME_BYTES) for _ in range(RING_SLOTS)]
+        self._free_slots = deque(range(RING_SLOTS))
+        
+    async def setup_microphone(self, queue):
+        """Menyiapkan mikrofon (mode callback) yang mengirim indeks slot frame ke queue"""
+        loop = asyncio.get_running_loop()
+        
+        def on_frame(in_data, frame_count, time_info, status):
+            # Dipanggil dari thread audio PortAudio; salin ke slot bebas lalu serahkan ke event loop
+            try:
+                slot = self._free_slots.popleft()
+            except IndexError:
+                # Semua slot masih antri (pengiriman tersendat): buang frame ini
+                return (None, pyaudio.paContinue)
+            self._buffers[slot][:] = in_data
+            loop.call_soon_threadsafe(queue.put_nowait, slot)
+            return (None, pyaudio.paContinue)
         
-    async def setup_microphone(self):
-        """Menyiapkan mikrofon untuk merekam audio"""
         mic_info = self.pya.get_default_input_device_info()
         audio_stream = await asyncio.to_thread(
             self.pya.open,
@@ -22,6 +43,7 @@ class AudioProcessor:
             input=True,
             input_device_index=mic_info["index"],
             frames_per_buffer=CHUNK_SIZE,
+            stream_callback=on_frame,
         )
         return audio_stream
     
@@ -36,13 +58,19 @@ class AudioProcessor:
         )
         return speaker_stream
     
-    async def record_audio(self, audio_stream, queue):
-        """Merekam audio dari mikrofon dan mengirimkannya ke queue"""
-        kwargs = {"exception_on_overflow": False}
-        
-        while True:
-            data = await asyncio.to_thread(audio_stream.read, CHUNK_SIZE, **kwargs)
-            await queue.put({"data": data, "mime_type": "audio/pcm"})
+    async def record_audio(self, audio_stream):
+        """Merekam audio dari mikrofon sampai task dibatalkan (frame dikirim oleh callback)"""
+        try:
+            # Stream callback sudah berjalan sejak dibuka
+            await asyncio.Future()
+        finally:
+            audio_stream.stop_stream()
+            audio_stream.close()
+    
+    def take_frame(self, slot, out):
+        """Tambahkan frame di slot ke buffer out lalu kembalikan slot ke ring"""
+        out += memoryview(self._buffers[slot])
+        self._free_slots.append(slot)
     
     async def play_audio(self, speaker_stream, queue):
         """Memutar audio yang diterima dari AI"""
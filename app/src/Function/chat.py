@@ -4,11 +4,15 @@ Modul backend untuk menangani fungsi AI dan chat - tidak berisi komponen UI
 
 from typing import Callable, Optional
 import os
+import asyncio
 
 # Import untuk backend RAG
 from Function.tools.rag import SimpleRAG
 from Function.tools.md import FileManager
 
+# Jumlah query yang diproses bersamaan (embedding + generasi), agar tidak melebihi rate limit API
+MAX_CONCURRENT_QUERIES = 4
+
 class ChatManager:
     """Kelas untuk mengelola logic chat dan LLM tanpa UI."""
     
@@ -26,34 +30,42 @@ class ChatManager:
         """
         self.rag = rag_instance
         self.status_callback = status_callback
+        # Semaphore dibuat di event loop saat query pertama: __init__ bisa berjalan di thread
+        # tanpa event loop, dan di Python 3.9 konstruktornya memanggil get_event_loop()
+        self._query_slots: Optional[asyncio.Semaphore] = None
     
-    def process_query(self, query: str) -> str:
+    async def process_query(self, query: str, status_callback: Optional[Callable[[str], None]] = None) -> str:
         """
         Memproses query pengguna dan mendapatkan respons.
         
         Args:
             query: Query dari pengguna
+            status_callback: Callback status panel asal query (default: status_callback manager)
             
         Returns:
             Respons dari AI
         """
+        status_callback = status_callback or self.status_callback
         try:
             # Update status jika callback tersedia
-            if self.status_callback:
-                self.status_callback(f"Memproses query: {query}")
+            if status_callback:
+                status_callback(f"Memproses query: {query}")
             
             # Gunakan RAG untuk memproses query
             # RAG akan langsung memperbarui markdown panel
-            response = self.rag.process_query(query)
+            if self._query_slots is None:
+                self._query_slots = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+            async with self._query_slots:
+                response = await self.rag.process_query(query)
             
-            if self.status_callback:
-                self.status_callback("Query selesai diproses")
+            if status_callback:
+                status_callback("Query selesai diproses")
             
             return response
         except Exception as e:
             error_message = f"Error saat memproses query: {str(e)}"
-            if self.status_callback:
-                self.status_callback(error_message)
+            if status_callback:
+                status_callback(error_message)
             return f"# Error\n\n{error_message}"
     
     def save_result_to_markdown(self, content: str, file_path: str) -> bool:
@@ -3,11 +3,45 @@ Modul untuk menangani operasi file markdown.
 """
 
 import os
-import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# O_NOATIME (Linux) menghindari penulisan atime pada setiap baca; hanya diizinkan untuk pemilik file
+_NOATIME = getattr(os, "O_NOATIME", 0)
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
 
 class FileManager:
     """Mengelola operasi file markdown."""
     
+    # Direktori yang sudah dipastikan ada, agar os.makedirs tidak dipanggil di setiap penulisan
+    _created_dirs: set = set()
+    
+    # Cache konten per path: path -> ((mtime_ns, size), konten)
+    _cache: dict = {}
+    
+    @staticmethod
+    def _read_bytes(file_path: str, size: int) -> bytes:
+        """
+        Baca seluruh file sebagai bytes dengan satu os.read, tanpa objek file Python.
+        
+        Args:
+            file_path: Path ke file
+            size: Ukuran file (dari os.stat yang sudah dilakukan pemanggil)
+            
+        Returns:
+            Isi file
+        """
+        try:
+            fd = os.open(file_path, _READ_FLAGS | _NOATIME)
+        except PermissionError:
+            # Bukan pemilik file: O_NOATIME ditolak (EPERM)
+            fd = os.open(file_path, _READ_FLAGS)
+        try:
+            return os.read(fd, size)
+        finally:
+            os.close(fd)
+    
     @staticmethod
     def read_markdown_file(file_path: str) -> str:
         """
@@ -20,8 +54,17 @@ class FileManager:
             Konten file markdown sebagai string
         """
         try:
-            with open(file_path, "r", encoding="utf-8") as md_file:
-                return md_file.read()
+            # Baca ulang hanya jika mtime atau ukuran file berubah
+            stat = os.stat(file_path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            cached = FileManager._cache.get(file_path)
+            if cached and cached[0] == key:
+                return cached[1]
+            
+            # Satu os.read + decode, tanpa TextIOWrapper
+            content = FileManager._read_bytes(file_path, stat.st_size).decode("utf-8", errors="replace")
+            FileManager._cache[file_path] = (key, content)
+            return content
         except Exception as e:
             return f"# Error Membaca File Markdown\n\nTerjadi kesalahan saat membaca file: {str(e)}"
     
@@ -38,13 +81,20 @@ class FileManager:
             True jika berhasil, False jika gagal
         """
         try:
-            # Pastikan direktori ada
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Pastikan direktori ada (sekali per direktori)
+            directory = os.path.dirname(file_path)
+            if directory not in FileManager._created_dirs:
+                os.makedirs(directory, exist_ok=True)
+                FileManager._created_dirs.add(directory)
             
-            with open(file_path, "w", encoding="utf-8") as md_file:
+            with open(file_path, "w", encoding="utf-8", buffering=1 << 16) as md_file:
                 md_file.write(content)
-            print(f"[INFO] Konten berhasil disimpan ke file: {time.strftime('%H:%M:%S')}")
+            
+            # Konten yang baru ditulis langsung menjadi isi cache
+            stat = os.stat(file_path)
+            FileManager._cache[file_path] = ((stat.st_mtime_ns, stat.st_size), content)
+            logger.debug("Konten berhasil disimpan ke file: %s", file_path)
             return True
         except Exception as e:
-            print(f"[ERROR] Gagal menyimpan ke file: {str(e)}")
+            logger.error("Gagal menyimpan ke file: %s", e)
             return False
@@ -2,11 +2,25 @@
 RAG (Retrieval Augmented Generation) - Modul untuk menangani retrieval dan generasi
 """
 
+import io
 import os
+import re
+import json
+import mmap
+import logging
 import pickle
+import sqlite3
+import hashlib
 import faiss
+import asyncio
+import queue
+import threading
+import time
+import textwrap
 import numpy as np
-from typing import List, Dict, Optional, Callable, Any, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable, Any, Tuple, AsyncIterator
 
 # Import untuk RAG
 try:
@@ -18,6 +32,15 @@ try:
 except ImportError:
     RAG_AVAILABLE = False
 
+# tiktoken opsional: jika tersedia, panjang konteks prompt dihitung dalam token
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 class AppConfig:
     """Konfigurasi aplikasi untuk RAG."""
     
@@ -25,10 +48,270 @@ class AppConfig:
     VECTOR_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "vector_store")
     EMBEDDING_MODEL = "models/text-embedding-004"
     GENERATION_MODEL = "gemini-2.0-flash"
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = 300  # Detik sebelum entri cache query kedaluwarsa
+    EMBED_CACHE_TTL = 30 * 24 * 3600  # Detik sebelum embedding query di disk dianggap usang
+    EMBED_BATCH_SIZE = 16  # Query maksimum per request embed_content
+    EMBED_BATCH_WAIT = 0.05  # Detik menunggu query lain sebelum request embedding dikirim
+    SEARCH_BATCH_SIZE = 64  # Vektor query maksimum per panggilan index.search
+    SEARCH_BATCH_WAIT = 0.005  # Vektor dari satu batch embedding tiba hampir bersamaan
+    MAX_CONTEXT_TOKENS = 6000  # Batas token konteks chunk di prompt (prefill menentukan latensi)
+    MIN_SCORE = float(os.environ.get("MIN_SCORE", 0.3))  # Cosine similarity minimum; chunk di bawahnya tidak dimasukkan ke prompt
+    FAISS_NPROBE = 16  # Jumlah list IVF yang diperiksa per query
+    EF_SEARCH = 64  # Lebar pencarian graf HNSW
+    STREAM_UPDATE_INTERVAL = 0.2  # Detik minimum antar update panel saat streaming (~5 Hz)
+    # Kuantisasi index flat: "flat" (tanpa kuantisasi), "sq8" (8-bit per dimensi) atau "pq" (IVF-PQ)
+    FAISS_QUANT = os.environ.get("FAISS_QUANT", "flat")
+    PQ_MIN_VECTORS = 10_000  # IVF-PQ butuh cukup vektor untuk training; di bawah ini dipakai SQ8
+    FAISS_THREADS = int(os.environ.get("FAISS_THREADS", os.cpu_count() or 1))
+
+class TextBlob:
+    """Daftar string read-only: satu blob UTF-8 gabungan + offset, keduanya memory-mapped"""
+    
+    def __init__(self, path: str):
+        """
+        Buka blob teks yang ditulis oleh LLM/train.py.
+        
+        Args:
+            path: Prefix file ({path}.bin dan {path}.offsets.npy)
+        """
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        
+        # mmap tidak bisa memetakan file kosong
+        self._blob = b""
+        if os.path.getsize(f"{path}.bin") > 0:
+            with open(f"{path}.bin", "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    @staticmethod
+    def save(path: str, texts: List[str]) -> None:
+        """
+        Simpan teks sebagai satu blob UTF-8 gabungan + array offset int64 (format LLM/train.py).
+        
+        Args:
+            path: Prefix file ({path}.bin dan {path}.offsets.npy)
+            texts: Daftar teks
+        """
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+        
+        with open(f"{path}.bin", "wb") as f:
+            f.writelines(encoded)
+        np.save(f"{path}.offsets.npy", offsets)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, idx: int) -> str:
+        # Hanya potongan yang diminta yang di-decode
+        return self._blob[self.offsets[idx]:self.offsets[idx + 1]].decode("utf-8")
+
+class QueryCache:
+    """Cache LRU dengan TTL yang aman dipakai dari beberapa thread."""
+    
+    def __init__(self, max_size: int = AppConfig.QUERY_CACHE_SIZE, ttl: float = AppConfig.QUERY_CACHE_TTL):
+        """
+        Inisialisasi QueryCache.
+        
+        Args:
+            max_size: Jumlah entri maksimum sebelum entri terlama dibuang
+            ttl: Umur maksimum entri dalam detik
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Ambil nilai dari cache.
+        
+        Args:
+            key: Kunci cache
+            
+        Returns:
+            Nilai yang di-cache, None jika tidak ada atau kedaluwarsa
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, value = entry
+            if time.monotonic() - timestamp > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Simpan nilai ke cache, membuang entri terlama jika penuh.
+        
+        Args:
+            key: Kunci cache
+            value: Nilai yang disimpan
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Ambil nilai dari cache atau hitung dan simpan jika belum ada.
+        
+        Args:
+            key: Kunci cache
+            compute: Fungsi tanpa argumen untuk menghitung nilai (dipanggil di luar lock)
+            
+        Returns:
+            Nilai yang di-cache atau baru dihitung
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+class QueryBatcher:
+    """Menggabungkan permintaan dari beberapa thread menjadi satu panggilan batch."""
+    
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch: int = 32, max_wait: float = 0.01):
+        """
+        Inisialisasi QueryBatcher.
+        
+        Args:
+            batch_fn: Fungsi yang memproses daftar item dan mengembalikan hasil per item
+            max_batch: Jumlah item maksimum per batch
+            max_wait: Waktu tunggu maksimum (detik) untuk mengumpulkan batch
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._requests: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def submit(self, item: Any) -> Future:
+        """
+        Kirim satu item untuk diproses dalam batch berikutnya.
+        
+        Args:
+            item: Item yang akan diproses
+            
+        Returns:
+            Future yang berisi hasil untuk item tersebut
+        """
+        future = Future()
+        self._requests.put((item, future))
+        return future
+    
+    def _run(self):
+        """Loop worker: kumpulkan item sampai max_batch atau max_wait, lalu proses sekaligus"""
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+class DiskEmbeddingCache:
+    """Cache embedding query persisten di SQLite, agar query umum tidak di-embed ulang setelah restart."""
+    
+    def __init__(self, path: str, ttl: float = AppConfig.EMBED_CACHE_TTL):
+        """
+        Buka (atau buat) database cache.
+        
+        Args:
+            path: Path file SQLite
+            ttl: Umur maksimum entri dalam detik; entri lebih lama dihapus saat dibuka
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB, model TEXT, vec BLOB, ts INTEGER, PRIMARY KEY (hash, model))"
+        )
+        self._conn.execute("DELETE FROM embeddings WHERE ts < ?", (int(time.time() - ttl),))
+        self._conn.commit()
+    
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Ambil embedding untuk beberapa teks.
+        
+        Args:
+            model: Nama model embedding
+            texts: Daftar teks
+            
+        Returns:
+            Vektor float32 per teks, None jika tidak ada di cache
+        """
+        with self._lock:
+            rows = [
+                self._conn.execute("SELECT vec FROM embeddings WHERE hash = ? AND model = ?", (self._key(text), model)).fetchone()
+                for text in texts
+            ]
+        return [np.frombuffer(row[0], dtype=np.float32) if row else None for row in rows]
+    
+    def put_many(self, model: str, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Simpan embedding untuk beberapa teks dalam satu transaksi.
+        
+        Args:
+            model: Nama model embedding
+            texts: Daftar teks
+            vectors: Array float32 dengan shape (len(texts), dim)
+        """
+        now = int(time.time())
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(self._key(text), model, vector.tobytes(), now) for text, vector in zip(texts, vectors)]
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Menutup koneksi database."""
+        with self._lock:
+            self._conn.close()
 
 class SimpleRAG:
     """Kelas untuk menangani RAG (Retrieval Augmented Generation)."""
     
+    # Kerangka prompt tetap; hanya konteks dan pertanyaan yang diisi per query
+    _PROMPT_TEMPLATE = textwrap.dedent("""
+        Berdasarkan informasi berikut, jawablah pertanyaan pengguna.
+        Jika jawabannya tidak ada dalam informasi yang diberikan, katakan bahwa kamu tidak memiliki informasi tersebut.
+        
+        Informasi:
+        {context}
+        
+        Pertanyaan pengguna: {query}
+        
+        Jawaban (dalam format Markdown):
+        """)
+    
     def __init__(self, vector_store_path: str = AppConfig.VECTOR_STORE_PATH, status_callback: Callable = None, markdown_viewer = None):
         """
         Inisialisasi SimpleRAG.
@@ -46,6 +329,18 @@ class SimpleRAG:
         self.generation_model = AppConfig.GENERATION_MODEL
         self.status_callback = status_callback
         self.markdown_viewer = markdown_viewer
+        # Status dapat dilaporkan dari beberapa thread (startup paralel, query bersamaan)
+        self._status_lock = threading.Lock()
+        
+        # Cache LRU+TTL embedding query agar pertanyaan berulang tidak memanggil API, dan
+        # hasil index.search (deterministik untuk index read-only) per (query, top_k)
+        self._query_cache = QueryCache()
+        self._search_cache = QueryCache()
+        
+        # Query dari beberapa thread UI digabung menjadi satu request embedding
+        self._embed_batcher = QueryBatcher(self._embed_batch, AppConfig.EMBED_BATCH_SIZE, AppConfig.EMBED_BATCH_WAIT)
+        # Vektor query yang datang bersamaan dicari dalam satu panggilan index.search
+        self._search_batcher = QueryBatcher(self._search_batch, AppConfig.SEARCH_BATCH_SIZE, AppConfig.SEARCH_BATCH_WAIT)
         
         # Konfigurasi API key
         self.api_key = os.environ.get("GOOGLE_API_KEY")
@@ -54,21 +349,32 @@ class SimpleRAG:
         
         genai.configure(api_key=self.api_key)
         
-        # Load vector store
-        self._update_status("Memuat vector store...")
-        self.load_vector_store()
-        
-        # Initialize generation model
-        self._update_status("Menginisialisasi model...")
-        self.model = genai.GenerativeModel(
-            model_name=self.generation_model,
-            generation_config={
-                "temperature": 0.2,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-        )
+        # Thread OpenMP FAISS dipakai saat beberapa query dicari dalam satu batch
+        faiss.omp_set_num_threads(AppConfig.FAISS_THREADS)
+        
+        # Load vector store dan inisialisasi model secara bersamaan: waktu startup = yang terlama
+        self._update_status("Memuat vector store dan menginisialisasi model...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            store_future = executor.submit(self.load_vector_store)
+            model_future = executor.submit(
+                genai.GenerativeModel,
+                model_name=self.generation_model,
+                generation_config={
+                    "temperature": 0.2,
+                    "top_p": 0.8,
+                    "top_k": 40,
+                    "max_output_tokens": 2048,
+                }
+            )
+            store_future.result()
+            self.model = model_future.result()
+        
+        # Tokenizer untuk membatasi konteks prompt; jumlah token di-cache per (doc_id, chunk_idx)
+        self._tokenizer = self._load_tokenizer()
+        self._token_counts: Dict[Tuple[str, int], int] = {}
+        
+        # Cache embedding query lapis kedua di disk (di samping vector store), bertahan antar restart
+        self._disk_cache = DiskEmbeddingCache(os.path.join(os.path.dirname(vector_store_path), "query_cache.sqlite"))
         
         self._update_status("RAG siap digunakan")
     
@@ -81,14 +387,17 @@ class SimpleRAG:
         """
         self.markdown_viewer = markdown_viewer
     
-    def update_markdown_panel(self, content: str):
+    def update_markdown_panel(self, content: str, persist: bool = True):
         """
         Update konten pada markdown panel.
         
         Args:
             content: Konten markdown yang akan ditampilkan
+            persist: False untuk update streaming (tanpa simpan file dan status)
         """
-        if self.markdown_viewer:
+        if self.markdown_viewer and not persist:
+            self.markdown_viewer.update_content(content, persist=False)
+        elif self.markdown_viewer:
             self.markdown_viewer.update_content(content)
             self._update_status(f"Markdown panel diperbarui dengan konten baru")
         else:
@@ -101,28 +410,177 @@ class SimpleRAG:
         Args:
             message: Pesan status
         """
-        if self.status_callback:
-            self.status_callback(message)
-        print(f"[RAG] {message}")
+        with self._status_lock:
+            if self.status_callback:
+                self.status_callback(message)
+        logger.info(message)
     
     def load_vector_store(self):
         """Load the vector store"""
         if not os.path.exists(f"{self.vector_store_path}.index"):
             raise FileNotFoundError(f"Vector store not found at {self.vector_store_path}.index")
         
-        if not os.path.exists(f"{self.vector_store_path}.pkl"):
-            raise FileNotFoundError(f"Vector store data not found at {self.vector_store_path}.pkl")
+        if not os.path.exists(f"{self.vector_store_path}.json") and not os.path.exists(f"{self.vector_store_path}.pkl"):
+            raise FileNotFoundError(f"Vector store data not found at {self.vector_store_path}.json")
+        
+        # Minta kernel mulai membaca file index ke page cache selagi proses lain berjalan
+        self._prefetch_file(f"{self.vector_store_path}.index")
         
-        # Load the index
-        self.index = faiss.read_index(f"{self.vector_store_path}.index")
+        # Load the index memory-mapped and read-only: pages are loaded on demand
+        # and shared between processes. The loaded index cannot be modified.
+        try:
+            self.index = faiss.read_index(f"{self.vector_store_path}.index", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Older index formats (or builds) cannot be memory-mapped
+            self.index = faiss.read_index(f"{self.vector_store_path}.index")
+        
+        # Cari dengan cosine similarity pada vektor ternormalisasi
+        self.index = self._ensure_inner_product(self.index)
+        # Kode terkuantisasi mengurangi byte yang dibaca per pencarian
+        self.index = self._quantize_index(self.index)
+        self._apply_search_params()
+        
+        # Store lama (pickle) dikonversi sekali ke format kolumnar agar startup berikutnya tidak unpickle
+        if not os.path.exists(f"{self.vector_store_path}.json"):
+            try:
+                self._convert_legacy_store()
+            except OSError as e:
+                logger.warning(f"Vector store lama tidak dapat dikonversi, memakai pickle: {str(e)}")
         
         # Load the documents
+        if os.path.exists(f"{self.vector_store_path}.json"):
+            # Store kolumnar: metadata dokumen JSON, kolom index npz, teks chunk memory-mapped
+            # (halaman teks hanya dibaca saat chunk tersebut muncul di hasil pencarian)
+            with open(f"{self.vector_store_path}.json", encoding="utf-8") as f:
+                self.documents = json.load(f)["documents"]
+            with np.load(f"{self.vector_store_path}.meta.npz") as meta:
+                self._chunk_doc_idx = meta["doc_idx"]
+                self._chunk_idx = meta["chunk_idx"]
+            self._chunk_texts = TextBlob(f"{self.vector_store_path}.chunks")
+            self._chunk_doc_ids = None
+        else:
+            # Store lama mem-pickle setiap dict chunk
+            with open(f"{self.vector_store_path}.pkl", "rb") as f:
+                data = pickle.load(f)
+            self.documents = data["documents"]
+            chunks_info = data["chunks_info"]
+            self._chunk_texts = [chunk["text"] for chunk in chunks_info]
+            self._chunk_doc_ids = [chunk["doc_id"] for chunk in chunks_info]
+            self._chunk_idx = np.array([chunk["chunk_idx"] for chunk in chunks_info], dtype=np.int32)
+        
+        self._update_status(f"Vector store dimuat: {len(self._chunk_texts)} chunks dari {len(self.documents)} dokumen")
+    
+    def _convert_legacy_store(self) -> None:
+        """Tulis ulang {path}.pkl ke format kolumnar (JSON + npz + blob teks) yang ditulis LLM/train.py"""
+        self._update_status("Mengonversi vector store lama ke format kolumnar...")
         with open(f"{self.vector_store_path}.pkl", "rb") as f:
             data = pickle.load(f)
-            self.documents = data["documents"]
-            self.chunks_info = data["chunks_info"]
+        documents = data["documents"]
+        chunks_info = data["chunks_info"]
+        doc_idx_by_id = {doc["id"]: i for i, doc in enumerate(documents)}
         
-        self._update_status(f"Vector store dimuat: {len(self.chunks_info)} chunks dari {len(self.documents)} dokumen")
+        TextBlob.save(f"{self.vector_store_path}.chunks", [chunk["text"] for chunk in chunks_info])
+        TextBlob.save(f"{self.vector_store_path}.docs", [doc["text"] for doc in documents])
+        np.savez(
+            f"{self.vector_store_path}.meta.npz",
+            doc_idx=np.array([doc_idx_by_id[chunk["doc_id"]] for chunk in chunks_info], dtype=np.int32),
+            chunk_idx=np.array([chunk["chunk_idx"] for chunk in chunks_info], dtype=np.int32)
+        )
+        
+        # JSON ditulis terakhir (atomik): keberadaannya menandakan konversi selesai
+        with open(f"{self.vector_store_path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "documents": [
+                    {**{key: value for key, value in doc.items() if key != "text"}, "size": len(doc["text"])}
+                    for doc in documents
+                ]
+            }, f, ensure_ascii=False)
+        os.replace(f"{self.vector_store_path}.json.tmp", f"{self.vector_store_path}.json")
+    
+    @staticmethod
+    def _prefetch_file(path: str) -> None:
+        """
+        Beri tahu kernel bahwa file akan segera dibaca (POSIX_FADV_WILLNEED), jika didukung OS.
+        
+        Args:
+            path: Path file yang akan dibaca
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    
+    def _chunk_doc_id(self, idx: int) -> str:
+        """
+        Ambil ID dokumen untuk satu chunk.
+        
+        Args:
+            idx: Indeks baris chunk di index FAISS
+            
+        Returns:
+            ID dokumen asal chunk
+        """
+        if self._chunk_doc_ids is not None:
+            return self._chunk_doc_ids[idx]
+        return self.documents[self._chunk_doc_idx[idx]]["id"]
+    
+    def _ensure_inner_product(self, index):
+        """Ubah index flat L2 menjadi index inner product ternormalisasi (di-cache sebagai file turunan)"""
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT or not isinstance(index, faiss.IndexFlat):
+            return index
+        
+        # {path}.index yang ada di git tidak ditimpa; hasil konversi disimpan di {path}.ip.index
+        ip_path = f"{self.vector_store_path}.ip.index"
+        if os.path.exists(ip_path) and os.path.getmtime(ip_path) >= os.path.getmtime(f"{self.vector_store_path}.index"):
+            return faiss.read_index(ip_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        
+        self._update_status("Mengonversi index ke inner product (cosine)...")
+        xb = index.reconstruct_n(0, index.ntotal)
+        faiss.normalize_L2(xb)
+        ip_index = faiss.IndexFlatIP(index.d)
+        ip_index.add(xb)
+        
+        # Tulis ke file sementara dulu: index turunan lama mungkin masih memory-mapped
+        faiss.write_index(ip_index, f"{ip_path}.tmp")
+        os.replace(f"{ip_path}.tmp", ip_path)
+        
+        return ip_index
+    
+    def _quantize_index(self, index):
+        """Bangun (atau muat yang sudah dibangun) index terkuantisasi dari index flat sesuai AppConfig.FAISS_QUANT"""
+        if AppConfig.FAISS_QUANT == "flat" or not isinstance(index, faiss.IndexFlat):
+            return index
+        
+        if AppConfig.FAISS_QUANT == "pq" and index.ntotal >= AppConfig.PQ_MIN_VECTORS and index.d % 32 == 0:
+            desc = f"IVF{int(4 * np.sqrt(index.ntotal))},PQ32"
+        else:
+            desc = "SQ8"
+        
+        # Index turunan di-cache di samping vector store, dengan nama dari deskripsinya
+        path = f"{self.vector_store_path}.{re.sub(r'[^A-Za-z0-9]+', '_', desc)}.index"
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(f"{self.vector_store_path}.index"):
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        
+        self._update_status(f"Membangun index {desc} untuk {index.ntotal} vektor...")
+        xb = index.reconstruct_n(0, index.ntotal)
+        quantized = faiss.index_factory(index.d, desc, index.metric_type)
+        quantized.train(xb)
+        quantized.add(xb)
+        faiss.write_index(quantized, path)
+        
+        return quantized
+    
+    def _apply_search_params(self):
+        """Set parameter pencarian (nprobe, efSearch) untuk index IVF/HNSW yang dibangun oleh train.py"""
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = AppConfig.FAISS_NPROBE
+        
+        if isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = AppConfig.EF_SEARCH
     
     def search_documents(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -137,87 +595,209 @@ class SimpleRAG:
         """
         self._update_status(f"Mencari dokumen untuk: {query}")
         
-        # Create embedding for the query
-        query_embedding = genai.embed_content(
-            model=self.embedding_model,
-            content=query,
-            task_type="retrieval_query"
+        # Create embedding for the query and search the index (batched with concurrent queries)
+        distances, indices = self._search_cache.get_or_compute(
+            (self.embedding_model, query, top_k),
+            lambda: self._search_batcher.submit((self._embed_query(query), top_k)).result()
         )
         
-        # Convert to numpy array
-        query_vector = np.array([query_embedding["embedding"]]).astype('float32')
-        
-        # Search the index
-        distances, indices = self.index.search(query_vector, top_k)
+        # Ambang skor hanya berlaku untuk index cosine (inner product); jarak L2 tidak sebanding
+        min_score = AppConfig.MIN_SCORE if self.index.metric_type == faiss.METRIC_INNER_PRODUCT else None
         
-        # Gather results
+        # Gather results, tanpa chunk duplikat (doc_id, chunk_idx) dari index pendekatan
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1:  # -1 means no result
-                chunk_info = self.chunks_info[idx]
-                results.append({
-                    "id": chunk_info["doc_id"],
-                    "chunk_idx": chunk_info["chunk_idx"],
-                    "text": chunk_info["text"],
-                    "score": float(distances[0][i])
-                })
+        seen = set()
+        for i, idx in enumerate(indices):
+            if idx == -1:  # -1 means no result
+                continue
+            # Semua hasil di bawah ambang: hit teratas tetap dipakai agar prompt tidak tanpa konteks
+            if min_score is not None and distances[i] < min_score and i > 0:
+                continue
+            key = (self._chunk_doc_id(idx), int(self._chunk_idx[idx]))
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append({
+                "id": key[0],
+                "chunk_idx": key[1],
+                "text": self._chunk_texts[idx],
+                "score": float(distances[i])
+            })
+        
+        if min_score is not None and results and results[0]["score"] < min_score:
+            logger.info(f"Tidak ada chunk dengan skor >= {min_score}, memakai hit teratas ({results[0]['score']:.3f})")
         
         self._update_status(f"Ditemukan {len(results)} dokumen relevan")
         return results
     
-    def generate_response(self, query: str, context_chunks: List[Dict[str, Any]]) -> str:
+    def _embed_query(self, query: str) -> np.ndarray:
         """
-        Generate a response based on the query and retrieved chunks.
+        Buat embedding query, memakai cache LRU+TTL untuk query yang sama.
         
         Args:
-            query: Query pengguna
-            context_chunks: Chunk konteks yang ditemukan
+            query: Query pencarian
             
         Returns:
-            Respons yang dihasilkan
+            Vektor query dengan shape (1, dim)
         """
-        self._update_status("Menghasilkan respons...")
+        return self._query_cache.get_or_compute(
+            (self.embedding_model, query, "retrieval_query"),
+            lambda: self._embed_batcher.submit(query).result()
+        )
+    
+    def _embed_batch(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Buat embedding untuk beberapa query dalam satu request.
+        
+        Args:
+            queries: Daftar query
+            
+        Returns:
+            Vektor per query, masing-masing dengan shape (1, dim)
+        """
+        cached = self._disk_cache.get_many(self.embedding_model, queries)
+        missing = [query for query, vector in zip(queries, cached) if vector is None]
         
-        # Prepare context from chunks
-        context = ""
-        for i, chunk in enumerate(context_chunks):
-            context += f"\nChunk {i+1} (dari {chunk['id']}):\n{chunk['text']}\n"
+        if missing:
+            query_embedding = genai.embed_content(
+                model=self.embedding_model,
+                content=missing,
+                task_type="retrieval_query"
+            )
+            
+            # Convert to numpy array langsung sebagai float32 (tanpa array float64 perantara + astype),
+            # dinormalisasi sekali (hasilnya di-cache) untuk pencarian cosine
+            query_vectors = np.array(query_embedding["embedding"], dtype=np.float32)
+            faiss.normalize_L2(query_vectors)
+            self._disk_cache.put_many(self.embedding_model, missing, query_vectors)
+            
+            fresh = iter(query_vectors)
+            cached = [vector if vector is not None else next(fresh) for vector in cached]
         
-        # Prepare prompt
-        prompt = f"""
-        Berdasarkan informasi berikut, jawablah pertanyaan pengguna.
-        Jika jawabannya tidak ada dalam informasi yang diberikan, katakan bahwa kamu tidak memiliki informasi tersebut.
+        return [vector.reshape(1, -1) for vector in cached]
+    
+    def _search_batch(self, requests: List[Tuple[np.ndarray, int]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Cari beberapa vektor query sekaligus dalam satu panggilan index.search.
         
-        Informasi:
-        {context}
+        Args:
+            requests: Daftar pasangan (vektor query (1, dim), top_k)
+            
+        Returns:
+            Pasangan (distances, indices) per query, dipotong sesuai top_k masing-masing
+        """
+        # Satu matriks (N, dim) float32 C-contiguous: FAISS memprosesnya sebagai satu GEMM tanpa salinan
+        query_vectors = np.ascontiguousarray(np.vstack([query_vector for query_vector, _ in requests]), dtype=np.float32)
+        distances, indices = self.index.search(query_vectors, max(top_k for _, top_k in requests))
+        return [(distances[i, :top_k], indices[i, :top_k]) for i, (_, top_k) in enumerate(requests)]
+    
+    def _load_tokenizer(self):
+        """Muat encoding cl100k_base, atau None untuk memakai perkiraan dari jumlah karakter"""
+        if not TIKTOKEN_AVAILABLE:
+            return None
         
-        Pertanyaan pengguna: {query}
+        try:
+            # File encoding diunduh saat pertama kali dipakai
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Tokenizer tidak tersedia, jumlah token diperkirakan dari panjang teks: {str(e)}")
+            return None
+    
+    def _count_tokens(self, chunk: Dict[str, Any]) -> int:
+        """
+        Hitung (atau ambil dari cache) jumlah token teks sebuah chunk.
         
-        Jawaban (dalam format Markdown):
+        Args:
+            chunk: Chunk hasil search_documents
+            
+        Returns:
+            Jumlah token; tanpa tokenizer diperkirakan ~4 karakter per token
         """
+        key = (chunk["id"], chunk["chunk_idx"])
+        count = self._token_counts.get(key)
+        if count is None:
+            if self._tokenizer is not None:
+                count = len(self._tokenizer.encode(chunk["text"]))
+            else:
+                count = len(chunk["text"]) // 4 + 1
+            self._token_counts[key] = count
+        return count
+    
+    def _fit_context(self, context_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Batasi chunk konteks pada AppConfig.MAX_CONTEXT_TOKENS, membuang skor terendah lebih dulu.
+        
+        Args:
+            context_chunks: Chunk hasil search_documents (urut dari skor tertinggi)
+            
+        Returns:
+            Chunk yang muat dalam anggaran token, urutan asli dipertahankan
+        """
+        budget = AppConfig.MAX_CONTEXT_TOKENS
+        kept = []
+        for chunk in sorted(context_chunks, key=lambda c: c["score"], reverse=True):
+            tokens = self._count_tokens(chunk)
+            if tokens > budget:
+                break
+            budget -= tokens
+            kept.append(chunk)
+        
+        # Chunk teratas selalu dipakai meskipun sendirian melebihi batas
+        if not kept and context_chunks:
+            kept.append(max(context_chunks, key=lambda c: c["score"]))
+        kept_ids = {id(chunk) for chunk in kept}
+        return [chunk for chunk in context_chunks if id(chunk) in kept_ids]
+    
+    async def generate_response(self, query: str, context_chunks: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """
+        Generate a response based on the query and retrieved chunks.
+        
+        Args:
+            query: Query pengguna
+            context_chunks: Chunk konteks yang ditemukan
+            
+        Yields:
+            Respons yang terakumulasi sejauh ini; nilai terakhir adalah respons lengkap
+        """
+        self._update_status("Menghasilkan respons...")
+        
+        # Prepare context from chunks, dibatasi anggaran token
+        context_chunks = self._fit_context(context_chunks)
+        context = "".join(
+            f"\nChunk {i+1} (dari {chunk['id']}):\n{chunk['text']}\n"
+            for i, chunk in enumerate(context_chunks)
+        )
+        
+        # Prepare prompt
+        prompt = self._PROMPT_TEMPLATE.format_map({"context": context, "query": query})
         
         # Generate response
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
-            
-            # Format untuk markdown yang baik
-            response_text = f"# Jawaban untuk: {query}\n\n{response_text}\n\n## Sumber Informasi\n\n"
+            # Stream token agar panel bisa menampilkan jawaban sebelum selesai; versi async
+            # tidak memblokir thread UI sehingga beberapa generasi bisa berjalan bersamaan
+            response = await self.model.generate_content_async(prompt, stream=True)
+            # Jawaban ditulis ke satu buffer (header lebih dulu) alih-alih += dan header + teks per chunk
+            buf = io.StringIO()
+            buf.write(f"# Jawaban untuk: {query}\n\n")
+            async for chunk in response:
+                buf.write(chunk.text)
+                yield buf.getvalue()
             
-            # Tambahkan sumber informasi
-            for i, chunk in enumerate(context_chunks):
-                doc_id = chunk['id']
-                response_text += f"- {doc_id}\n"
+            # Format untuk markdown yang baik; tambahkan sumber informasi, satu baris per dokumen
+            # (urutan kemunculan dipertahankan)
+            buf.write("\n\n## Sumber Informasi\n\n")
+            for doc_id in dict.fromkeys(chunk['id'] for chunk in context_chunks):
+                buf.write(f"- {doc_id}\n")
             
             self._update_status("Respons berhasil dihasilkan")
-            return response_text
+            yield buf.getvalue()
                 
         except Exception as e:
             error_msg = f"Error saat menghasilkan respons: {str(e)}"
             self._update_status(error_msg)
-            return f"# Error\n\n{error_msg}"
+            yield f"# Error\n\n{error_msg}"
     
-    def process_query(self, query: str) -> str:
+    async def process_query(self, query: str) -> str:
         """
         Proses query dari awal hingga akhir.
         
@@ -228,14 +808,21 @@ class SimpleRAG:
             Respons yang dihasilkan
         """
         try:
-            # Retrieve relevant chunks
-            results = self.search_documents(query)
+            # Retrieve relevant chunks (blocking embed/search berjalan di thread)
+            results = await asyncio.to_thread(self.search_documents, query)
             
             if not results:
                 response = f"# Tidak ada informasi\n\nMaaf, saya tidak menemukan informasi yang relevan untuk pertanyaan: {query}"
             else:
-                # Generate response
-                response = self.generate_response(query, results)
+                # Generate response, menampilkan potongan jawaban saat tiba
+                response = ""
+                last_update = 0.0
+                async for response in self.generate_response(query, results):
+                    # Batasi laju update parsial; respons lengkap selalu ditampilkan di bawah
+                    now = time.monotonic()
+                    if now - last_update >= AppConfig.STREAM_UPDATE_INTERVAL:
+                        last_update = now
+                        self.update_markdown_panel(response, persist=False)
             
             # Update markdown panel langsung
             self.update_markdown_panel(response)
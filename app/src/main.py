@@ -6,9 +6,14 @@ Aplikasi Markdown Kiosk - Viewer dengan pemantauan perubahan otomatis dan RAG
 
 from __future__ import annotations
 
-import os
 import sys
-from typing import Dict
+import pathlib
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict
 
 import flet as ft
 
@@ -17,7 +22,7 @@ from ui.components import (
     AppColors, AppStyles, 
     RAGQueryPanel, LLMCommandPanel, 
     CarouselPanel, DateTimePanel,
-    MarkdownViewer
+    MarkdownViewer, PeriodicScheduler, coalescer
 )
 
 # Import modul-modul backend
@@ -25,19 +30,26 @@ from Function.tools.rag import SimpleRAG, RAG_AVAILABLE
 from Function.tools.md import FileManager
 from Function.chat import ChatManager
 
+logger = logging.getLogger(__name__)
+
 # Import untuk dotenv
 try:
     from dotenv import load_dotenv
     # Load environment variables from .env file if it exists
     load_dotenv()
 except ImportError:
-    print("dotenv tidak tersedia, API key harus diatur secara manual")
+    logger.warning("dotenv tidak tersedia, API key harus diatur secara manual")
 
 
 # =============================================================================
 # KONSTANTA DAN KONFIGURASI
 # =============================================================================
 
+# Path dihitung sekali saat import, bukan setiap kali aplikasi dibuat
+BASE_DIR = pathlib.Path(__file__).resolve().parent
+MD_DIR = BASE_DIR / "md"
+MD_FILE = MD_DIR / "main.md"
+
 class AppConfig:
     """Konfigurasi aplikasi."""
     
@@ -47,6 +59,34 @@ class AppConfig:
     WINDOW_HEIGHT = 800
     UPDATE_INTERVAL = 1  # Detik untuk update waktu
     CAROUSEL_INTERVAL = 5  # Detik untuk rotasi carousel
+    LOG_FORMAT = "[%(levelname)s] %(asctime)s %(name)s: %(message)s"
+    LOG_DATE_FORMAT = "%H:%M:%S"
+
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Pasang logging berbasis antrian: pemanggil hanya memasukkan record ke queue,
+    penulisan ke stderr dilakukan oleh thread QueueListener.
+    
+    Args:
+        level: Level logging root
+        
+    Returns:
+        QueueListener yang sudah berjalan
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(AppConfig.LOG_FORMAT, AppConfig.LOG_DATE_FORMAT))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
+    
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Flush sisa record saat proses berhenti
+    atexit.register(listener.stop)
+    return listener
 
 
 # =============================================================================
@@ -59,9 +99,17 @@ class MarkdownApp:
     def __init__(self):
         """Inisialisasi aplikasi."""
         self.md_file_path = None
-        self.components = {}
+        # Semua slot komponen dibuat di awal agar tabel dict tidak tumbuh saat inisialisasi
+        self.components = {
+            "markdown_viewer": None,
+            "datetime_panel": None,
+            "carousel_panel": None,
+            "rag_panel": None,
+            "llm_command": None,
+        }
         self.rag = None
         self.chat_manager = None
+        self.scheduler = None
     
     def initialize(self, page: ft.Page) -> None:
         """
@@ -89,7 +137,7 @@ class MarkdownApp:
         self._setup_event_handlers(page)
         
         # Mulai semua thread dan monitor
-        self._start_components()
+        self._start_components(page)
     
     def _setup_page(self, page: ft.Page) -> None:
         """
@@ -107,16 +155,17 @@ class MarkdownApp:
     
     def _setup_file_path(self) -> None:
         """Setup path ke file markdown."""
-        md_file_path = os.path.join(os.path.dirname(__file__), "md", "main.md")
-        self.md_file_path = os.path.abspath(md_file_path)
+        self.md_file_path = str(MD_FILE)
         
         # Pastikan direktori md ada
-        os.makedirs(os.path.dirname(self.md_file_path), exist_ok=True)
+        MD_DIR.mkdir(exist_ok=True)
         
-        # Buat file markdown jika belum ada
-        if not os.path.exists(self.md_file_path):
-            with open(self.md_file_path, "w", encoding="utf-8") as f:
+        # Buat file markdown jika belum ada (mode "x": cek dan buat dalam satu open)
+        try:
+            with open(self.md_file_path, "x", encoding="utf-8") as f:
                 f.write("# Selamat Datang\n\nIni adalah aplikasi Markdown Kiosk dengan RAG.")
+        except FileExistsError:
+            pass
     
     def _init_components(self, page: ft.Page) -> None:
         """
@@ -128,6 +177,9 @@ class MarkdownApp:
         # Komponen markdown viewer
         self.components["markdown_viewer"] = MarkdownViewer(page, self.md_file_path)
         
+        # Satu thread untuk semua update periodik (datetime dan carousel)
+        self.scheduler = PeriodicScheduler(page)
+        
         # Komponen datetime
         self.components["datetime_panel"] = DateTimePanel(page, update_interval=AppConfig.UPDATE_INTERVAL)
         
@@ -145,111 +197,123 @@ class MarkdownApp:
     
     def _init_rag(self, page: ft.Page) -> None:
         """
-        Inisialisasi RAG jika tersedia.
+        Buat panel RAG; vector store dan model dimuat di thread terpisah (lihat _load_rag_bg)
+        agar frame pertama tidak menunggu RAG siap.
         
         Args:
             page: Halaman Flet utama
         """
+        def on_rag_query(query: str, status_callback: Callable[[str], None] = None) -> bool:
+            # Tolak query selama RAG belum siap atau gagal dimuat; panel asal menyimpan input
+            if self.chat_manager is None:
+                return False
+            # Jalankan di event loop Flet agar handler UI tidak menunggu generasi selesai;
+            # status proses dikirim ke panel asal query
+            page.run_task(self.chat_manager.process_query, query, status_callback)
+            return True
+        
+        # Tambahkan komponen RAG query dan panel LLM Command
+        self.components["rag_panel"] = RAGQueryPanel(
+            page,
+            on_query=on_rag_query
+        )
+        self.components["llm_command"] = LLMCommandPanel(
+            page,
+            rag_handler=on_rag_query
+        )
+        
+        # Status awal ikut render pertama; hasil pemuatan diterapkan oleh _apply_rag_state
         if RAG_AVAILABLE:
-            try:
-                # Hubungkan langsung dengan MarkdownViewer
-                self.rag = SimpleRAG(
-                    markdown_viewer=self.components["markdown_viewer"]
-                )
-                
-                # Buat status callback untuk UI panel
-                def status_callback(message: str):
-                    if "rag_panel" in self.components:
-                        self.components["rag_panel"].status_callback(message)
-                
-                # Inisialisasi ChatManager
-                self.chat_manager = ChatManager(
-                    rag_instance=self.rag,
-                    status_callback=status_callback,
-                    # Tidak perlu result_callback lagi karena RAG langsung update markdown
-                )
-                
-                # Handler untuk query dari UI
-                def on_rag_query(query: str):
-                    self.chat_manager.process_query(query)
-                
-                # Tambahkan komponen RAG query
-                self.components["rag_panel"] = RAGQueryPanel(
-                    page,
-                    on_query=on_rag_query
-                )
-                
-                # Tambahkan panel LLM Command
-                self.components["llm_command"] = LLMCommandPanel(
-                    page,
-                    rag_handler=on_rag_query
-                )
-                
-                # Tambahkan tanda sukses di carousel
-                carousel_items = [
-                    "✅ RAG berhasil dimuat dan siap digunakan",
-                    "Tanyakan sesuatu tentang UKRI untuk memulai",
-                    "Gunakan panel LLM Command di bawah"
-                ]
-                self.components["carousel_panel"].items = carousel_items
-                
-                # Update status di LLM Command
-                self.components["llm_command"].status_text.value = "RAG siap digunakan"
-                self.components["llm_command"].status_text.color = AppColors.GREEN
-                
-            except Exception as e:
-                print(f"Error initializing RAG: {str(e)}")
-                
-                # Tambahkan RAG Panel for display errors
-                def on_rag_query(query: str):
-                    pass  # No-op karena RAG gagal dimuat
-                
-                self.components["rag_panel"] = RAGQueryPanel(
-                    page,
-                    on_query=on_rag_query
-                )
-                
-                self.components["llm_command"] = LLMCommandPanel(
-                    page,
-                    rag_handler=on_rag_query
-                )
-                
-                self.components["rag_panel"].status_text.value = f"Error: {str(e)}"
-                self.components["rag_panel"].status_text.color = AppColors.RED
-                
-                # Update status di LLM Command juga
-                self.components["llm_command"].status_text.value = f"Error: {str(e)}"
-                self.components["llm_command"].status_text.color = AppColors.RED
-                
-                # Tambahkan pesan error di carousel
-                carousel_items = [
-                    "❌ RAG gagal dimuat: " + str(e),
-                    "Pastikan file vector store tersedia",
-                    "Dan API key telah dikonfigurasi dengan benar"
-                ]
-                self.components["carousel_panel"].items = carousel_items
+            self._set_rag_status("Memuat RAG...", AppColors.ACCENT, "Memuat RAG...")
         else:
-            # Tambahkan komponen UI meskipun RAG tidak tersedia
-            def on_rag_query(query: str):
-                pass  # No-op karena RAG tidak tersedia
-            
-            self.components["rag_panel"] = RAGQueryPanel(
-                page,
-                on_query=on_rag_query
+            self._set_rag_status("Dependensi RAG tidak tersedia", AppColors.RED, "Dependensi RAG tidak tersedia")
+    
+    def _set_rag_status(self, llm_status: str, status_color: str, rag_status: str = None) -> None:
+        """
+        Set teks status RAG di panel LLM Command dan (opsional) panel RAG query.
+        
+        Args:
+            llm_status: Pesan status untuk panel LLM Command
+            status_color: Warna teks status
+            rag_status: Pesan status untuk panel RAG query (None: tidak diubah)
+        """
+        if rag_status is not None:
+            self.components["rag_panel"].status_text.value = rag_status
+            self.components["rag_panel"].status_text.color = status_color
+        self.components["llm_command"].status_text.value = llm_status
+        self.components["llm_command"].status_text.color = status_color
+    
+    def _load_rag_bg(self, page: ft.Page) -> None:
+        """
+        Muat SimpleRAG dan ChatManager di thread latar, lalu terapkan hasilnya di event loop Flet.
+        
+        Args:
+            page: Halaman Flet utama
+        """
+        try:
+            # Hubungkan langsung dengan MarkdownViewer
+            rag = SimpleRAG(
+                markdown_viewer=self.components["markdown_viewer"]
             )
             
-            self.components["llm_command"] = LLMCommandPanel(
-                page,
-                rag_handler=on_rag_query
+            # Buat status callback untuk UI panel
+            def status_callback(message: str):
+                if self.components["rag_panel"] is not None:
+                    self.components["rag_panel"].status_callback(message)
+            
+            # Inisialisasi ChatManager
+            chat_manager = ChatManager(
+                rag_instance=rag,
+                status_callback=status_callback,
+                # Tidak perlu result_callback lagi karena RAG langsung update markdown
             )
             
-            # Update status
-            self.components["rag_panel"].status_text.value = "Dependensi RAG tidak tersedia"
-            self.components["rag_panel"].status_text.color = AppColors.RED
+            # (pesan status LLM Command, pesan status RAG panel, warna, item carousel)
+            # Tanda sukses di LLM Command dan carousel; status RAG panel dikosongkan
+            state = ("RAG siap digunakan", "", AppColors.GREEN, [
+                "✅ RAG berhasil dimuat dan siap digunakan",
+                "Tanyakan sesuatu tentang UKRI untuk memulai",
+                "Gunakan panel LLM Command di bawah"
+            ])
+            
+        except Exception as e:
+            logger.error(f"Error initializing RAG: {str(e)}")
+            rag = chat_manager = None
             
-            # Update status di LLM Command juga
-            self.components["llm_command"].status_text.value = "Dependensi RAG tidak tersedia"
-            self.components["llm_command"].status_text.color = AppColors.RED
+            # Pesan error di kedua panel dan carousel
+            state = (f"Error: {str(e)}", f"Error: {str(e)}", AppColors.RED, [
+                "❌ RAG gagal dimuat: " + str(e),
+                "Pastikan file vector store tersedia",
+                "Dan API key telah dikonfigurasi dengan benar"
+            ])
+        
+        # Semua mutasi UI dilakukan di event loop agar tidak bersaing dengan rotasi carousel
+        page.run_task(self._apply_rag_state, page, rag, chat_manager, *state)
+    
+    async def _apply_rag_state(self, page: ft.Page, rag, chat_manager, llm_status: str,
+                               rag_status: str, status_color: str, carousel_items: list) -> None:
+        """
+        Terapkan hasil pemuatan RAG ke aplikasi dan UI dalam satu update.
+        
+        Args:
+            page: Halaman Flet utama
+            rag: Instance SimpleRAG (None jika gagal)
+            chat_manager: Instance ChatManager (None jika gagal)
+            llm_status: Pesan status untuk panel LLM Command
+            rag_status: Pesan status untuk panel RAG query
+            status_color: Warna teks status
+            carousel_items: Item baru untuk carousel
+        """
+        self.rag = rag
+        self.chat_manager = chat_manager
+        self._set_rag_status(llm_status, status_color, rag_status)
+        self.components["carousel_panel"].items = carousel_items
+        coalescer.request_update(
+            page,
+            self.components["rag_panel"].status_text,
+            self.components["llm_command"].status_text,
+            self.components["carousel_panel"].carousel_column
+        )
     
     def _setup_layout(self, page: ft.Page) -> None:
         """
@@ -265,13 +329,11 @@ class MarkdownApp:
         ]
         
         # Tambahkan LLM command panel
-        if "llm_command" in self.components:
+        if self.components["llm_command"] is not None:
             right_column.append(self.components["llm_command"].view)
         
-        right_panel = ft.Container(
-            content=ft.Column(right_column),
-            width=320
-        )
+        # Column bisa diberi lebar sendiri; Container pembungkus hanya menambah node di pohon kontrol
+        right_panel = ft.Column(right_column, width=320)
         
         # Layout utama
         main_layout = ft.Row([
@@ -299,19 +361,33 @@ class MarkdownApp:
         """
         def on_close(e: ft.ControlEvent) -> None:
             """Handler untuk event penutupan aplikasi."""
-            print("[INFO] Menghentikan pemantau file...")
+            logger.info("Menghentikan pemantau file...")
             self.components["markdown_viewer"].stop_monitoring()
+            self.scheduler.stop()
+            # Jangan kirim page.update() yang tertunda setelah Flet mulai membongkar halaman
+            coalescer.discard(page)
         
         page.on_close = on_close
     
-    def _start_components(self) -> None:
-        """Mulai semua komponen yang memerlukan thread atau observer."""
-        self.components["datetime_panel"].start()
-        self.components["carousel_panel"].start()
+    def _start_components(self, page: ft.Page) -> None:
+        """
+        Mulai semua komponen yang memerlukan thread atau observer.
+        
+        Args:
+            page: Halaman Flet utama
+        """
+        self.components["datetime_panel"].start(self.scheduler)
+        self.components["carousel_panel"].start(self.scheduler)
+        self.scheduler.start()
         self.components["markdown_viewer"].start_monitoring()
+        
+        # RAG dimuat setelah layout terpasang agar hasilnya bisa langsung ditampilkan
+        if RAG_AVAILABLE:
+            threading.Thread(target=self._load_rag_bg, args=(page,), daemon=True).start()
     
     def run(self) -> None:
         """Jalankan aplikasi."""
+        setup_logging()
         ft.app(target=self.initialize)
 
 
@@ -3,6 +3,7 @@ Export semua komponen UI dalam satu paket
 """
 
 from .theme import AppColors, AppStyles
+from .scheduler import PeriodicScheduler, UpdateCoalescer, coalescer, set_value
 from .datetime_panel import DateTimePanel
 from .carousel_panel import CarouselPanel
 from .chat_input import RAGQueryPanel, LLMCommandPanel
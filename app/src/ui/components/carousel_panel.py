@@ -2,25 +2,17 @@
 Komponen UI untuk menampilkan carousel (rotasi pesan)
 """
 
-import time
-import threading
+import itertools
 import flet as ft
-from typing import List
-
-class AppColors:
-    """Palet warna aplikasi."""
-    
-    BASE = "#F5EEDC"      # Warna dasar/background
-    PRIMARY = "#27548A"   # Warna utama 
-    SECONDARY = "#183B4E" # Warna sekunder
-    ACCENT = "#DDA853"    # Warna aksen
-    WHITE = "white"       # Warna putih
-    GREEN = "#4CAF50"     # Warna hijau
-    RED = "#F44336"       # Warna merah
+from typing import List, Tuple
+from .scheduler import PeriodicScheduler
+from .theme import AppColors, ACCENT_BORDER, TOP_MARGIN
 
 class CarouselPanel:
     """Komponen panel carousel."""
     
+    __slots__ = ("page", "carousel_interval", "carousel_column", "view", "_items", "_text_nodes", "_transitions")
+    
     def __init__(self, page: ft.Page, items: List[str], carousel_interval: int = 5):
         """
         Inisialisasi panel carousel.
@@ -31,46 +23,71 @@ class CarouselPanel:
             carousel_interval: Interval rotasi dalam detik
         """
         self.page = page
-        self.items = items
-        self.current_index = 0
         self.carousel_interval = carousel_interval
         
-        # Text untuk carousel
-        self.carousel_text = ft.Text(
-            self.items[self.current_index],
-            size=16,
-            color=AppColors.PRIMARY,
-            text_align=ft.TextAlign.CENTER
+        # Column berisi satu Text per item; rotasi hanya mengganti visibilitas
+        self.carousel_column = ft.Column(
+            [], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=30
         )
+        self.items = items
         
         # Container untuk carousel
         self.view = ft.Container(
-            content=ft.Column([
-                self.carousel_text,
-            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=30),
+            content=self.carousel_column,
             height=200,
             bgcolor=AppColors.BASE,
-            border=ft.border.all(2, AppColors.ACCENT),
+            border=ACCENT_BORDER,
             border_radius=10,
             padding=10,
-            margin=ft.margin.only(top=10),
+            margin=TOP_MARGIN,
             alignment=ft.alignment.center
         )
+    
+    @property
+    def items(self) -> Tuple[str, ...]:
+        """Daftar item carousel (tuple, tidak diubah di tempat)."""
+        return self._items
+    
+    @items.setter
+    def items(self, items: List[str]) -> None:
+        """Ganti daftar item dan buat ulang kontrol Text untuk tiap item."""
+        self._items = tuple(items)
+        self._text_nodes = [
+            ft.Text(
+                item,
+                size=16,
+                color=AppColors.PRIMARY,
+                text_align=ft.TextAlign.CENTER,
+                visible=(i == 0)
+            )
+            for i, item in enumerate(items)
+        ]
+        self.carousel_column.controls = self._text_nodes
         
-        # Thread untuk rotasi carousel
-        self._thread = threading.Thread(
-            target=self._rotate_carousel, 
-            daemon=True
-        )
+        # Pasangan (tersembunyi, tampil) per tick dihitung sekali; rotasi tanpa indeks dan modulo
+        nodes = self._text_nodes
+        self._transitions = itertools.cycle(zip(nodes, nodes[1:] + nodes[:1])) if len(nodes) > 1 else None
     
-    def _rotate_carousel(self) -> None:
-        """Fungsi untuk merotasi item carousel secara periodik."""
-        while True:
-            time.sleep(self.carousel_interval)
-            self.current_index = (self.current_index + 1) % len(self.items)
-            self.carousel_text.value = self.items[self.current_index]
-            self.page.update()
+    def _rotate_carousel(self) -> List[ft.Control]:
+        """
+        Merotasi item carousel (update kontrol dilakukan oleh scheduler).
+        
+        Returns:
+            Teks yang visibilitasnya berubah
+        """
+        if self._transitions is None:
+            return []
+        
+        previous, current = next(self._transitions)
+        previous.visible = False
+        current.visible = True
+        return [previous, current]
     
-    def start(self) -> None:
-        """Memulai thread rotasi carousel."""
-        self._thread.start() 
\ No newline at end of file
+    def start(self, scheduler: PeriodicScheduler) -> None:
+        """
+        Mendaftarkan rotasi carousel ke scheduler bersama.
+        
+        Args:
+            scheduler: Scheduler periodik aplikasi
+        """
+        scheduler.add(self.carousel_interval, self._rotate_carousel)
@@ -3,26 +3,104 @@ Komponen UI untuk menangani input chat dan query
 """
 
 import flet as ft
-from typing import Callable
+from .scheduler import coalescer, set_value
+from .theme import AppColors, ACCENT_BUTTON_STYLE, PRIMARY_BORDER, PRIMARY_LABEL_STYLE, TOP_MARGIN
+from typing import Callable, Optional, Tuple
 
-class AppColors:
-    """Palet warna aplikasi."""
+# Panjang maksimum teks status; query panjang tidak ikut di-render utuh di baris status
+STATUS_MAX_CHARS = 60
+
+# Status saat handler menolak query (RAG belum dimuat atau gagal dimuat); input tidak dikosongkan
+NOT_READY_STATUS = "RAG belum siap, query tidak dikirim"
+
+def _short(text: str, limit: int = STATUS_MAX_CHARS) -> str:
+    """Potong teks status yang melebihi limit dengan elipsis."""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def _build_input_panel(
+    *,
+    title: str,
+    label: str,
+    hint: str,
+    min_lines: int,
+    max_lines: Optional[int],
+    button_text: str,
+    button_icon: str,
+    button_width: Optional[int],
+    status_text: ft.Text,
+    height: int,
+    on_submit: Callable[[ft.ControlEvent], None]
+) -> Tuple[ft.TextField, ft.ElevatedButton, ft.Container]:
+    """
+    Susun panel input (judul, TextField, tombol dan status) yang dipakai RAGQueryPanel dan LLMCommandPanel.
     
-    BASE = "#F5EEDC"      # Warna dasar/background
-    PRIMARY = "#27548A"   # Warna utama 
-    SECONDARY = "#183B4E" # Warna sekunder
-    ACCENT = "#DDA853"    # Warna aksen
-    WHITE = "white"       # Warna putih
-    GREEN = "#4CAF50"     # Warna hijau
-    RED = "#F44336"       # Warna merah
+    Args:
+        title: Judul panel
+        label: Label TextField
+        hint: Hint TextField
+        min_lines: Jumlah baris minimum TextField
+        max_lines: Jumlah baris maksimum TextField (None: tanpa batas)
+        button_text: Teks tombol submit
+        button_icon: Ikon tombol submit
+        button_width: Lebar tombol (None: mengikuti isi)
+        status_text: Kontrol teks status di samping tombol
+        height: Tinggi panel
+        on_submit: Handler untuk submit dari TextField maupun tombol
+        
+    Returns:
+        Tuple (TextField, tombol, Container panel)
+    """
+    text_field = ft.TextField(
+        label=label,
+        hint_text=hint,
+        multiline=True,
+        min_lines=min_lines,
+        max_lines=max_lines,
+        on_submit=on_submit,
+        border_color=AppColors.PRIMARY,
+        label_style=PRIMARY_LABEL_STYLE
+    )
+    
+    button = ft.ElevatedButton(
+        button_text,
+        on_click=on_submit,
+        width=button_width,
+        icon=button_icon,
+        style=ACCENT_BUTTON_STYLE
+    )
+    
+    view = ft.Container(
+        content=ft.Column([
+            ft.Text(
+                title,
+                size=18,
+                weight=ft.FontWeight.BOLD,
+                color=AppColors.PRIMARY
+            ),
+            text_field,
+            ft.Row([
+                button,
+                status_text
+            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        ]),
+        height=height,
+        bgcolor=AppColors.BASE,
+        border=PRIMARY_BORDER,
+        border_radius=10,
+        padding=10,
+        margin=TOP_MARGIN
+    )
+    return text_field, button, view
 
 class RAGQueryPanel:
     """Panel untuk query RAG."""
     
+    __slots__ = ("page", "on_query", "status_text", "status_callback", "query_input", "submit_button", "view")
+    
     def __init__(
         self, 
         page: ft.Page, 
-        on_query: Callable[[str], None],
+        on_query: Callable[[str, Callable[[str], None]], bool],
         status_callback: Callable[[str], None] = None
     ):
         """
@@ -30,7 +108,8 @@ class RAGQueryPanel:
         
         Args:
             page: Halaman Flet
-            on_query: Callback untuk query baru
+            on_query: Callback untuk query baru; menerima callback status panel ini dan
+                mengembalikan False jika query ditolak
             status_callback: Callback untuk status
         """
         self.page = page
@@ -44,56 +123,25 @@ class RAGQueryPanel:
         
         # Status callback
         def update_status(message: str):
-            self.status_text.value = message
-            self.page.update()
+            # Semua status (termasuk dari ChatManager/RAG yang menyertakan query) dipotong di sini
+            if set_value(self.status_text, _short(message)):
+                coalescer.request_update(self.page, self.status_text)
         
         self.status_callback = update_status if status_callback is None else status_callback
         
-        # Query input
-        self.query_input = ft.TextField(
+        # Input, tombol dan container panel
+        self.query_input, self.submit_button, self.view = _build_input_panel(
+            title="Tanya AI",
             label="Ketik pertanyaan Anda",
-            hint_text="Contoh: Siapa rektor UKRI?",
-            multiline=True,
+            hint="Contoh: Siapa rektor UKRI?",
             min_lines=2,
             max_lines=4,
-            on_submit=self._on_submit_query,
-            border_color=AppColors.PRIMARY,
-            label_style=ft.TextStyle(color=AppColors.PRIMARY)
-        )
-        
-        # Button untuk mengirim query
-        self.submit_button = ft.ElevatedButton(
-            "Tanyakan", 
-            on_click=self._on_submit_query,
-            icon=ft.icons.SEARCH,
-            style=ft.ButtonStyle(
-                shape=ft.RoundedRectangleBorder(radius=10),
-                color=AppColors.BASE,
-                bgcolor=AppColors.ACCENT
-            )
-        )
-        
-        # Container untuk RAG panel
-        self.view = ft.Container(
-            content=ft.Column([
-                ft.Text(
-                    "Tanya AI", 
-                    size=18, 
-                    weight=ft.FontWeight.BOLD, 
-                    color=AppColors.PRIMARY
-                ),
-                self.query_input,
-                ft.Row([
-                    self.submit_button,
-                    self.status_text
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-            ]),
+            button_text="Tanyakan",
+            button_icon=ft.icons.SEARCH,
+            button_width=None,
+            status_text=self.status_text,
             height=180,
-            bgcolor=AppColors.BASE,
-            border=ft.border.all(2, AppColors.PRIMARY),
-            border_radius=10,
-            padding=10,
-            margin=ft.margin.only(top=10)
+            on_submit=self._on_submit_query
         )
     
     def _on_submit_query(self, e: ft.ControlEvent) -> None:
@@ -105,54 +153,35 @@ class RAGQueryPanel:
         """
         if self.query_input.value:
             query = self.query_input.value
-            self.status_callback(f"Memproses: {query}")
-            self.on_query(query)
+            # Status proses dan hasil dilaporkan ChatManager lewat callback status panel ini
+            if not self.on_query(query, self.status_callback):
+                self.status_callback(NOT_READY_STATUS)
+                return
             self.query_input.value = ""
-            self.page.update()
+            coalescer.request_update(self.page, self.query_input)
 
 
 class LLMCommandPanel:
     """Komponen panel untuk input perintah LLM."""
     
+    __slots__ = ("page", "rag_handler", "command_input", "submit_button", "status_text", "view")
+    
     def __init__(
         self, 
         page: ft.Page, 
-        rag_handler: Callable[[str], None]
+        rag_handler: Callable[[str, Callable[[str], None]], bool]
     ):
         """
         Inisialisasi panel perintah LLM.
         
         Args:
             page: Halaman Flet tempat panel berada
-            rag_handler: Handler untuk memproses query RAG
+            rag_handler: Handler untuk memproses query RAG; menerima callback status panel ini
+                dan mengembalikan False jika query ditolak
         """
         self.page = page
         self.rag_handler = rag_handler
         
-        # Input field
-        self.command_input = ft.TextField(
-            label="Tanyakan ke AI",
-            hint_text="Ketik pertanyaan Anda tentang UKRI...",
-            multiline=True,
-            min_lines=3,
-            on_submit=self._process_llm_query,
-            border_color=AppColors.PRIMARY,
-            label_style=ft.TextStyle(color=AppColors.PRIMARY)
-        )
-        
-        # Button untuk submit query
-        self.submit_button = ft.ElevatedButton(
-            "Proses dengan AI", 
-            on_click=self._process_llm_query,
-            width=200,
-            icon=ft.icons.PSYCHOLOGY_ALT,
-            style=ft.ButtonStyle(
-                shape=ft.RoundedRectangleBorder(radius=10),
-                color=AppColors.BASE,
-                bgcolor=AppColors.ACCENT
-            )
-        )
-        
         # Status text
         self.status_text = ft.Text(
             value="Siap menerima pertanyaan",
@@ -161,29 +190,31 @@ class LLMCommandPanel:
             italic=True
         )
         
-        # Container untuk command panel
-        self.view = ft.Container(
-            content=ft.Column([
-                ft.Text(
-                    "LLM Command", 
-                    size=18, 
-                    weight=ft.FontWeight.BOLD, 
-                    color=AppColors.PRIMARY
-                ),
-                self.command_input,
-                ft.Row([
-                    self.submit_button,
-                    self.status_text
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-            ]),
+        # Input, tombol dan container panel
+        self.command_input, self.submit_button, self.view = _build_input_panel(
+            title="LLM Command",
+            label="Tanyakan ke AI",
+            hint="Ketik pertanyaan Anda tentang UKRI...",
+            min_lines=3,
+            max_lines=None,
+            button_text="Proses dengan AI",
+            button_icon=ft.icons.PSYCHOLOGY_ALT,
+            button_width=200,
+            status_text=self.status_text,
             height=200,
-            bgcolor=AppColors.BASE,
-            border=ft.border.all(2, AppColors.PRIMARY),
-            border_radius=10,
-            padding=10,
-            margin=ft.margin.only(top=10)
+            on_submit=self._process_llm_query
         )
     
+    def _update_status(self, message: str) -> None:
+        """
+        Perbarui teks status panel (dipanggil juga oleh ChatManager untuk query dari panel ini).
+        
+        Args:
+            message: Pesan status
+        """
+        if set_value(self.status_text, _short(message)):
+            coalescer.request_update(self.page, self.status_text)
+    
     def _process_llm_query(self, e: ft.ControlEvent) -> None:
         """
         Proses query LLM.
@@ -194,14 +225,15 @@ class LLMCommandPanel:
         if self.command_input.value:
             query = self.command_input.value
             
-            # Update status
-            self.status_text.value = f"Memproses: {query}"
-            self.page.update()
+            # Status di-set sebelum task dijadwalkan, agar tidak menimpa status dari ChatManager
+            self._update_status("Query dikirim, menunggu jawaban...")
             
-            # Kirim query ke RAG handler
-            self.rag_handler(query)
+            # Kirim query ke RAG handler (hanya menjadwalkan task, kembali segera); status proses,
+            # selesai dan error dikirim balik ke panel ini
+            if not self.rag_handler(query, self._update_status):
+                # Query ditolak: input dipertahankan agar tidak hilang
+                self._update_status(NOT_READY_STATUS)
+                return
             
-            # Reset input field dan update status
             self.command_input.value = ""
-            self.status_text.value = "Query berhasil diproses"
-            self.page.update() 
\ No newline at end of file
+            coalescer.request_update(self.page, self.command_input) 
\ No newline at end of file
@@ -3,24 +3,24 @@ Komponen UI untuk menampilkan tanggal dan waktu
 """
 
 import time
-import threading
 import flet as ft
-from typing import Dict
+from typing import Dict, List
+from .scheduler import PeriodicScheduler, set_value
+from .theme import AppColors, SECONDARY_BORDER
 
-class AppColors:
-    """Palet warna aplikasi."""
-    
-    BASE = "#F5EEDC"      # Warna dasar/background
-    PRIMARY = "#27548A"   # Warna utama 
-    SECONDARY = "#183B4E" # Warna sekunder
-    ACCENT = "#DDA853"    # Warna aksen
-    WHITE = "white"       # Warna putih
-    GREEN = "#4CAF50"     # Warna hijau
-    RED = "#F44336"       # Warna merah
+# Format tanggal dan waktu yang ditampilkan
+_DATE_FMT = "%d-%m-%Y"
+_TIME_FMT = "%H:%M:%S"
+
+# Referensi fungsi diikat sekali agar tick tidak melakukan lookup atribut modul
+_localtime = time.localtime
+_strftime = time.strftime
 
 class DateTimePanel:
     """Komponen panel tanggal dan waktu."""
     
+    __slots__ = ("page", "update_interval", "date_text", "time_text", "date_container", "time_container", "view", "_last_day")
+    
     def __init__(self, page: ft.Page, update_interval: int = 1):
         """
         Inisialisasi panel tanggal dan waktu.
@@ -61,7 +61,7 @@ class DateTimePanel:
             width=150,
             height=70,
             bgcolor=AppColors.PRIMARY,
-            border=ft.border.all(2, AppColors.SECONDARY),
+            border=SECONDARY_BORDER,
             border_radius=10,
             padding=5,
             alignment=ft.alignment.center
@@ -81,35 +81,48 @@ class DateTimePanel:
             width=100,
             height=70,
             bgcolor=AppColors.PRIMARY,
-            border=ft.border.all(2, AppColors.SECONDARY),
+            border=SECONDARY_BORDER,
             border_radius=10,
             padding=5,
             alignment=ft.alignment.center
         )
         
+        # Hari terakhir yang ditampilkan (tm_year, tm_yday)
+        self._last_day = None
+        
         # Row untuk date dan time
         self.view = ft.Row(
             [self.date_container, self.time_container],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN
         )
-        
-        # Thread untuk update waktu
-        self._thread = threading.Thread(
-            target=self._update_time_date, 
-            daemon=True
-        )
     
-    def _update_time_date(self) -> None:
-        """Fungsi untuk mengupdate tanggal dan waktu secara periodik."""
-        import datetime
+    def _update_time_date(self) -> List[ft.Control]:
+        """
+        Mengupdate nilai tanggal dan waktu (update kontrol dilakukan oleh scheduler).
         
-        while True:
-            now = datetime.datetime.now()
-            self.date_text.value = now.strftime("%d-%m-%Y")
-            self.time_text.value = now.strftime("%H:%M:%S")
-            self.page.update()
-            time.sleep(self.update_interval)
+        Returns:
+            Daftar teks yang berubah
+        """
+        # struct_time dari time.localtime lebih ringan daripada objek datetime
+        now = _localtime()
+        changed = []
+        
+        # Tanggal hanya dihitung ulang saat hari berganti
+        if (now.tm_year, now.tm_yday) != self._last_day:
+            self._last_day = (now.tm_year, now.tm_yday)
+            if set_value(self.date_text, _strftime(_DATE_FMT, now)):
+                changed.append(self.date_text)
+        
+        if set_value(self.time_text, _strftime(_TIME_FMT, now)):
+            changed.append(self.time_text)
+        return changed
     
-    def start(self) -> None:
-        """Memulai thread update waktu."""
-        self._thread.start() 
\ No newline at end of file
+    def start(self, scheduler: PeriodicScheduler) -> None:
+        """
+        Mendaftarkan update waktu ke scheduler bersama.
+        
+        Args:
+            scheduler: Scheduler periodik aplikasi
+        """
+        # Tick pada pergantian detik agar jam tidak tertinggal hingga satu interval
+        scheduler.add(self.update_interval, self._update_time_date, run_immediately=True, align=True)
@@ -3,54 +3,261 @@ Modul UI untuk komponen-komponen markdown viewer
 """
 
 import os
-import time
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import flet as ft
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileModifiedEvent
+from .scheduler import coalescer
+from .theme import PRIMARY_BORDER
 
-class MarkdownFileHandler(FileSystemEventHandler):
-    """Handler untuk memantau perubahan pada file markdown."""
+# inotify_simple opsional (Linux): event hanya untuk file yang dipantau, tanpa polling
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Jumlah update ekor sebelum blok yang sudah lengkap dipindah ke bagian tetap
+TAIL_MERGE_UPDATES = 20
+
+# Karakter/pola yang membutuhkan parser markdown lengkap (termasuk autolink GITHUB_WEB)
+_MD_SIG_RE = re.compile(r'[#*_`~\[\]|>\\<-]|https?://|www\.')
+
+# Batas lunak panjang dokumen (karakter); bagian awal dibuang agar biaya parse tetap O(batas)
+MAX_MD_CHARS = 2 * 1024 * 1024
+TRUNCATED_MARKER = "…[truncated]…\n\n"
+
+# Debounce maksimum (kelipatan jeda debounce) untuk file yang terus-menerus ditulis
+DEBOUNCE_MAX_ROUNDS = 10
+
+# Flag untuk fd file markdown yang di-cache (O_CLOEXEC/O_BINARY tidak ada di semua OS);
+# O_NOATIME (Linux, hanya untuk pemilik file) menghindari update atime pada setiap baca
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+_NOATIME = getattr(os, "O_NOATIME", 0)
+
+# FileManager (paket Function) diimpor sekali saat pertama dipakai, bukan saat modul UI dimuat
+_file_manager = None
+
+def _get_file_manager():
+    """Kembalikan kelas FileManager, diimpor pada pemanggilan pertama."""
+    global _file_manager
+    if _file_manager is None:
+        from Function.tools.md import FileManager
+        _file_manager = FileManager
+    return _file_manager
+
+class MarkdownFileHandler:
+    """Pemantau perubahan file markdown dengan inotify (jika tersedia) atau polling mtime."""
     
-    def __init__(self, markdown_component: ft.Markdown, md_file_path: str):
+    __slots__ = ("viewer", "md_file_path", "poll_interval", "debounce", "_last_stat", "_fd", "_fd_ino", "_stop_event", "_thread", "_executor", "_reload_pending", "_reload_lock", "_last_hash", "_written_stat")
+    
+    def __init__(self, viewer: "MarkdownViewer", md_file_path: str, poll_interval: float = 0.5, debounce: float = 0.2):
         """
         Inisialisasi handler pemantau file.
         
         Args:
-            markdown_component: Komponen markdown yang akan diperbarui
+            viewer: MarkdownViewer yang akan diperbarui
             md_file_path: Path ke file markdown yang dipantau
+            poll_interval: Interval pengecekan file dalam detik (juga batas tunggu event inotify)
+            debounce: Jeda (detik) sebelum membaca agar penulisan bertahap oleh editor selesai
         """
-        super().__init__()
-        self.markdown_component = markdown_component
+        self.viewer = viewer
         self.md_file_path = md_file_path
-        self.page = markdown_component.page
+        self.poll_interval = poll_interval
+        self.debounce = debounce
         
-    def on_modified(self, event: FileModifiedEvent) -> None:
-        """
-        Dipanggil ketika file markdown dimodifikasi.
+        self._last_stat = self._stat_signature()
+        self._fd = None
+        self._fd_ino = None
+        # Hash byte mentah terakhir yang dimuat; None berarti harus dibaca ulang
+        self._last_hash = None
+        # Signature file setelah penulisan terakhir oleh viewer sendiri
+        self._written_stat = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._inotify_loop if INOTIFY_AVAILABLE else self._poll_loop, daemon=True
+        )
         
-        Args:
-            event: Event modifikasi file
-        """
-        if event.src_path == self.md_file_path:
+        # Pembacaan ulang berjalan di satu worker; paling banyak satu job yang antri
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._reload_pending = False
+        self._reload_lock = threading.Lock()
+    
+    def _stat_signature(self):
+        """Ambil (mtime ns, ukuran) file, None jika file tidak ada."""
+        try:
+            st = os.stat(self.md_file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _poll_loop(self) -> None:
+        """Cek mtime dan ukuran file secara periodik dan muat ulang saat berubah."""
+        while not self._stop_event.wait(self.poll_interval):
+            signature = self._stat_signature()
+            if signature is not None and signature != self._last_stat:
+                self._last_stat = signature
+                self._schedule_reload()
+    
+    def _inotify_loop(self) -> None:
+        """Tunggu event inotify pada file itu sendiri; event file lain di direktori disaring kernel."""
+        # ATTRIB menandai rename-swap: inode lama kehilangan link tetapi masih terbuka lewat fd cache
+        mask = (inotify_flags.MODIFY | inotify_flags.CLOSE_WRITE | inotify_flags.ATTRIB
+                | inotify_flags.MOVE_SELF | inotify_flags.DELETE_SELF)
+        timeout_ms = int(self.poll_interval * 1000)
+        
+        with INotify() as inotify:
+            wd, watched_ino = None, None
+            while not self._stop_event.is_set():
+                if wd is None:
+                    try:
+                        watched_ino = os.stat(self.md_file_path).st_ino
+                        wd = inotify.add_watch(self.md_file_path, mask)
+                    except OSError:
+                        # File sedang diganti; coba lagi setelah satu interval
+                        self._stop_event.wait(self.poll_interval)
+                        continue
+                    # File baru mungkin sudah berbeda dari yang terakhir dimuat
+                    signature = self._stat_signature()
+                    if signature != self._last_stat:
+                        self._last_stat = signature
+                        self._schedule_reload()
+                
+                if not inotify.read(timeout=timeout_ms):
+                    continue
+                
+                # Satu stat per batch event memberi inode dan signature sekaligus
+                try:
+                    st = os.stat(self.md_file_path)
+                except OSError:
+                    st = None
+                
+                # Watch mengikuti inode: jika path kini menunjuk file lain, pasang ulang watch pada path
+                if st is None or st.st_ino != watched_ino:
+                    try:
+                        inotify.rm_watch(wd)
+                    except OSError:
+                        pass  # Sudah dilepas kernel (IN_IGNORED)
+                    wd = None
+                    continue
+                
+                signature = (st.st_mtime_ns, st.st_size)
+                if signature != self._last_stat:
+                    self._last_stat = signature
+                    self._schedule_reload()
+    
+    def _schedule_reload(self) -> None:
+        """Jadwalkan pembacaan ulang di worker, digabung jika sudah ada yang antri."""
+        with self._reload_lock:
+            if self._reload_pending:
+                return
+            self._reload_pending = True
+        self._executor.submit(self._do_reload)
+    
+    def _do_reload(self) -> None:
+        """Jalankan pembacaan ulang; flag dibersihkan dulu agar perubahan selama membaca memicu satu reload lagi."""
+        # Debounce trailing: tunggu sampai file tidak berubah selama satu jeda debounce, sehingga
+        # rangkaian penulisan editor digabung ke reload yang sama
+        signature = self._stat_signature()
+        for _ in range(DEBOUNCE_MAX_ROUNDS):
+            if self._stop_event.wait(self.debounce):
+                return
+            current = self._stat_signature()
+            if current == signature:
+                break
+            signature = current
+        with self._reload_lock:
+            self._reload_pending = False
+        self._reload()
+    
+    def mark_written(self) -> None:
+        """Catat mtime terbaru setelah viewer sendiri menulis file, agar tidak dibaca ulang."""
+        self._last_stat = self._written_stat = self._stat_signature()
+        # Isi yang tampil tidak lagi sesuai hash terakhir
+        self._last_hash = None
+    
+    def start(self) -> None:
+        """Memulai thread polling."""
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Menghentikan thread polling."""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.close()
+    
+    def close(self) -> None:
+        """Menutup fd file yang di-cache."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._fd_ino = None
+    
+    def _read_file(self) -> bytes:
+        """Membaca file lewat fd yang di-cache; dibuka ulang jika file diganti (rename-swap editor)."""
+        # Satu stat memberi inode, ukuran dan mtime sekaligus
+        st = os.stat(self.md_file_path)
+        if self._fd is None or self._fd_ino != st.st_ino:
+            self.close()
             try:
-                with open(self.md_file_path, "r", encoding="utf-8") as md_file:
-                    new_content = md_file.read()
-                    
-                # Pastikan komponen dan page masih ada (tidak None)
-                if self.markdown_component and self.page:
-                    self.markdown_component.value = new_content
-                    self.page.update()
-                    print(f"[INFO] File markdown berhasil diperbarui: {time.strftime('%H:%M:%S')}")
-                else:
-                    print(f"[WARNING] Tidak dapat memperbarui UI: komponen atau page tidak tersedia")
-                    
-            except Exception as e:
-                print(f"[ERROR] Gagal memperbarui markdown: {str(e)}")
+                self._fd = os.open(self.md_file_path, _OPEN_FLAGS | _NOATIME)
+            except PermissionError:
+                self._fd = os.open(self.md_file_path, _OPEN_FLAGS)
+            self._fd_ino = os.fstat(self._fd).st_ino
+        
+        # Signature dari stat yang sama dengan data yang dibaca, agar poll berikutnya tidak membaca ulang
+        self._last_stat = (st.st_mtime_ns, st.st_size)
+        size = st.st_size
+        if hasattr(os, "pread"):
+            data = os.pread(self._fd, size, 0)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            data = os.read(self._fd, size)
+        return data
+    
+    def _reload(self) -> None:
+        """Membaca ulang file markdown dan memperbarui komponen."""
+        try:
+            # File masih berisi penulisan viewer sendiri; tampilan mungkin sudah lebih baru
+            # (penulisan berjalan di background), jadi jangan timpa tampilan dengan isi file
+            if self._written_stat is not None and self._stat_signature() == self._written_stat:
+                return
+            
+            data = self._read_file()
+            
+            # Tulis ulang dengan isi identik (touch, autosave): lewati decode dan update
+            data_hash = hash(data)
+            if data_hash == self._last_hash:
+                return
+            new_content = data.decode("utf-8")
+            
+            # Pastikan komponen dan page masih ada (tidak None); page baru terisi
+            # setelah komponen ditambahkan ke halaman
+            page = self.viewer.markdown_view.page if self.viewer else None
+            if page:
+                self._last_hash = data_hash
+                if not self.viewer.set_markdown(new_content):
+                    return
+                coalescer.request_update(page, self.viewer.markdown_view, self.viewer.tail_view)
+                logger.info("File markdown berhasil diperbarui")
+            else:
+                logger.warning("Tidak dapat memperbarui UI: komponen atau page tidak tersedia")
+                
+        except Exception as e:
+            logger.error("Gagal memperbarui markdown: %s", e)
 
 
 class MarkdownViewer:
     """Komponen untuk menampilkan dan mengontrol markdown."""
     
+    __slots__ = ("page", "md_file_path", "content", "markdown_view", "tail_view", "view", "_file_handler", "_last_hash", "_tail_updates",
+                 "_write_executor", "_pending_write", "_write_lock")
+    
     def __init__(self, page: ft.Page, md_file_path: str):
         """
         Inisialisasi viewer markdown.
@@ -63,57 +270,171 @@ class MarkdownViewer:
         self.md_file_path = md_file_path
         
         # Baca konten file
-        from Function.tools.md import FileManager
-        self.content = FileManager.read_markdown_file(md_file_path)
+        self.content = _get_file_manager().read_markdown_file(md_file_path)
         
-        # Komponen markdown
-        self.markdown_view = ft.Markdown(
-            value=self.content,
-            selectable=True,
-            extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
-            on_tap_link=lambda e: page.launch_url(e.data),
-            expand=True,
-        )
+        # Komponen markdown: bagian tetap (jarang di-render ulang) dan ekor untuk tambahan terbaru
+        self.markdown_view = self._create_markdown("")
+        self.tail_view = self._create_markdown("")
+        self._reset_markdown(self.content)
+        self._last_hash = hash(self.content)
         
         # Container untuk markdown
         self.view = ft.Container(
-            content=ft.Column([self.markdown_view]),
+            content=ft.Column([self.markdown_view, self.tail_view]),
             padding=10,
             expand=True,
             bgcolor="white",
-            border=ft.border.all(2, "#27548A"),
+            border=PRIMARY_BORDER,
             border_radius=10,
         )
         
-        # File handler untuk memantau perubahan
-        self._file_handler = MarkdownFileHandler(self.markdown_view, md_file_path)
-        self._observer = Observer()
-        self._observer.schedule(
-            self._file_handler, 
-            os.path.dirname(md_file_path), 
-            recursive=False
+        # File handler untuk memantau perubahan (hanya file ini, bukan seluruh direktori)
+        self._file_handler = MarkdownFileHandler(self, md_file_path)
+        
+        # Penulisan file di satu worker background; hanya konten terbaru yang antri ditulis
+        self._write_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_write = None
+        self._write_lock = threading.Lock()
+    
+    def _create_markdown(self, value: str) -> ft.Markdown:
+        """Buat kontrol Markdown dengan pengaturan viewer."""
+        return ft.Markdown(
+            value=value,
+            selectable=True,
+            extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
+            on_tap_link=lambda e: self.page.launch_url(e.data),
+            expand=True,
         )
     
-    def update_content(self, content: str) -> None:
+    @staticmethod
+    def _assign(control: ft.Markdown, text: str) -> None:
+        """Set nilai kontrol; teks polos memakai extension set minimal."""
+        control.value = text
+        extension_set = ft.MarkdownExtensionSet.GITHUB_WEB if _MD_SIG_RE.search(text) else ft.MarkdownExtensionSet.NONE
+        if control.extension_set != extension_set:
+            control.extension_set = extension_set
+    
+    @staticmethod
+    def _split_blocks(text: str):
+        """Pisahkan teks pada batas paragraf terakhir (di luar blok kode) menjadi (kepala, ekor)."""
+        split = text.rfind("\n\n")
+        if split <= 0 or text.count("```", 0, split) % 2:
+            return "", text
+        return text[:split], text[split:]
+    
+    @property
+    def value(self) -> str:
+        """Konten markdown yang sedang ditampilkan."""
+        return (self.markdown_view.value or "") + (self.tail_view.value or "")
+    
+    def set_markdown(self, content: str) -> bool:
+        """
+        Tampilkan konten. Jika konten hanya menambah di akhir, hanya kontrol ekor yang berubah
+        sehingga Flet tidak mem-parse ulang seluruh dokumen.
+        
+        Args:
+            content: Konten markdown lengkap
+            
+        Returns:
+            False jika konten sama dengan yang sedang ditampilkan (tidak ada perubahan)
+        """
+        # Konten identik (mis. file yang baru ditulis lalu dibaca ulang) tidak menyentuh Flet
+        content_hash = hash(content)
+        if content_hash == self._last_hash and content == self.value:
+            return False
+        self._last_hash = content_hash
+        
+        committed = self.markdown_view.value or ""
+        if not content.startswith(committed):
+            # Konten diganti: mulai ulang dari batas paragraf terakhir
+            self._reset_markdown(content)
+            return True
+        
+        tail = content[len(committed):]
+        self._tail_updates += 1
+        if self._tail_updates >= TAIL_MERGE_UPDATES:
+            # Sesekali pindahkan blok yang sudah lengkap ke bagian tetap
+            head, tail = self._split_blocks(tail)
+            if head:
+                self._assign(self.markdown_view, committed + head)
+            self._tail_updates = 0
+        
+        self._assign(self.tail_view, tail)
+        return True
+    
+    @staticmethod
+    def _truncate(content: str) -> str:
+        """
+        Potong bagian awal konten yang melebihi MAX_MD_CHARS, mulai dari batas paragraf.
+        
+        Args:
+            content: Konten markdown lengkap
+            
+        Returns:
+            Konten yang sama jika masih di bawah batas, selain itu bagian akhir dengan penanda
+        """
+        if len(content) <= MAX_MD_CHARS:
+            return content
+        start = len(content) - MAX_MD_CHARS + len(TRUNCATED_MARKER)
+        split = content.find("\n\n", start)
+        # Tanpa batas paragraf: potong langsung pada batas karakter
+        return TRUNCATED_MARKER + content[split + 2 if split >= 0 else start:]
+    
+    def _reset_markdown(self, content: str) -> None:
+        """Tampilkan konten baru sepenuhnya, dipisah pada batas paragraf terakhir."""
+        head, tail = self._split_blocks(content)
+        self._assign(self.markdown_view, head)
+        self._assign(self.tail_view, tail)
+        self._tail_updates = 0
+    
+    def update_content(self, content: str, persist: bool = True) -> None:
         """
         Update konten markdown langsung.
         
         Args:
             content: Konten baru
+            persist: Simpan juga ke file (False untuk update streaming sementara)
         """
-        self.markdown_view.value = content
+        # Update streaming bersifat sementara; batas diterapkan pada konten yang disimpan
+        if persist:
+            content = self._truncate(content)
+        changed = self.set_markdown(content)
         
-        # Simpan ke file
-        from Function.tools.md import FileManager
-        FileManager.write_markdown_file(self.md_file_path, content)
+        # Simpan ke file; tetap ditulis meskipun tampilan tidak berubah, karena update streaming
+        # sebelumnya (persist=False) bisa sudah menampilkan konten yang sama tanpa menyimpannya
+        if persist:
+            self._persist(content)
+        
+        # Konten sama dengan yang tampil: tidak ada yang perlu dikirim ke Flet
+        if changed:
+            coalescer.request_update(self.page, self.markdown_view, self.tail_view)
+    
+    def _persist(self, content: str) -> None:
+        """
+        Jadwalkan penulisan konten ke file tanpa memblokir thread pemanggil (event loop Flet).
         
-        self.page.update()
+        Args:
+            content: Konten lengkap yang akan disimpan
+        """
+        with self._write_lock:
+            scheduled = self._pending_write is not None
+            # Penulisan lengkap yang lebih baru menggantikan yang masih antri
+            self._pending_write = content
+        if not scheduled:
+            self._write_executor.submit(self._flush_write)
+    
+    def _flush_write(self) -> None:
+        """Tulis konten terbaru yang antri (berjalan di worker penulisan)."""
+        with self._write_lock:
+            content, self._pending_write = self._pending_write, None
+        _get_file_manager().write_markdown_file(self.md_file_path, content)
+        self._file_handler.mark_written()
     
     def start_monitoring(self) -> None:
         """Memulai pemantauan perubahan file."""
-        self._observer.start()
+        self._file_handler.start()
     
     def stop_monitoring(self) -> None:
-        """Menghentikan pemantauan perubahan file."""
-        self._observer.stop()
-        self._observer.join()
+        """Menghentikan pemantauan perubahan file, setelah penulisan yang antri selesai."""
+        self._write_executor.shutdown(wait=True)
+        self._file_handler.stop()
@@ -0,0 +1,185 @@
+"""
+Penjadwal tugas periodik UI di event loop Flet dan penggabung page.update()
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import threading
+import flet as ft
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class UpdateCoalescer:
+    """Menggabungkan permintaan update menjadi paling banyak satu page.update() per interval."""
+    
+    def __init__(self, interval: float = 0.05):
+        """
+        Inisialisasi coalescer.
+        
+        Args:
+            interval: Jeda maksimum (detik) antara permintaan dan page.update()
+        """
+        self.interval = interval
+        self._lock = threading.Lock()
+        # id(page) -> (page, kontrol yang berubah); None berarti seluruh halaman
+        self._pending: Dict[int, Tuple[ft.Page, Optional[Dict[int, ft.Control]]]] = {}
+        self._timer = None
+    
+    def request_update(self, page: ft.Page, *controls: ft.Control) -> None:
+        """
+        Tandai kontrol (atau seluruh halaman) perlu diperbarui; update dikirim sekali saat timer berakhir.
+        
+        Args:
+            page: Halaman Flet yang akan diperbarui
+            controls: Kontrol yang berubah; kosong berarti seluruh halaman
+        """
+        with self._lock:
+            _, targets = self._pending.get(id(page), (page, {}))
+            if not controls:
+                targets = None
+            elif targets is not None:
+                targets.update((id(control), control) for control in controls)
+            self._pending[id(page)] = (page, targets)
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def discard(self, page: ft.Page) -> None:
+        """
+        Buang update yang tertunda untuk halaman (dipanggil saat halaman ditutup).
+        
+        Args:
+            page: Halaman Flet yang sedang ditutup
+        """
+        with self._lock:
+            self._pending.pop(id(page), None)
+            # Timer dibatalkan jika tidak ada halaman lain yang menunggu
+            if not self._pending and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+    
+    def _flush(self) -> None:
+        """Kirim satu page.update() untuk setiap halaman yang ditandai."""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._timer = None
+        
+        # Hanya diff kontrol yang berubah yang dikirim, bukan seluruh pohon kontrol
+        for page, targets in pending:
+            if targets is None:
+                page.update()
+            else:
+                page.update(*targets.values())
+
+# Coalescer bersama untuk semua komponen UI
+coalescer = UpdateCoalescer()
+
+def set_value(control: ft.Control, value) -> bool:
+    """
+    Set control.value hanya jika berbeda.
+    
+    Args:
+        control: Kontrol Flet yang memiliki atribut value
+        value: Nilai baru
+        
+    Returns:
+        True jika nilai berubah (halaman perlu diperbarui)
+    """
+    if control.value == value:
+        return False
+    control.value = value
+    return True
+
+class PeriodicTask:
+    """Satu tugas periodik yang terdaftar di PeriodicScheduler."""
+    
+    def __init__(self, interval: float, callback: Callable[[], List[ft.Control]], next_run: float):
+        """
+        Inisialisasi tugas periodik.
+        
+        Args:
+            interval: Interval eksekusi dalam detik
+            callback: Fungsi yang hanya mengubah nilai komponen (tanpa page.update()),
+                mengembalikan daftar kontrol yang berubah
+            next_run: Waktu eksekusi berikutnya (time.monotonic())
+        """
+        self.interval = interval
+        self.callback = callback
+        self.next_run = next_run
+
+class PeriodicScheduler:
+    """Menjalankan semua tugas periodik sebagai satu task asyncio dengan satu update halaman per tick."""
+    
+    def __init__(self, page: ft.Page):
+        """
+        Inisialisasi scheduler.
+        
+        Args:
+            page: Halaman Flet yang diperbarui setelah tugas berjalan
+        """
+        self.page = page
+        # Min-heap (next_run, urutan, tugas): tugas terdekat selalu di puncak
+        self._heap: List[Tuple[float, int, PeriodicTask]] = []
+        self._counter = itertools.count()
+        self._future = None
+    
+    def add(self, interval: float, callback: Callable[[], List[ft.Control]], run_immediately: bool = False, align: bool = False) -> None:
+        """
+        Daftarkan tugas periodik.
+        
+        Args:
+            interval: Interval eksekusi dalam detik
+            callback: Fungsi yang mengubah nilai komponen, mengembalikan daftar kontrol yang berubah
+            run_immediately: Jalankan pada tick pertama, bukan setelah satu interval
+            align: Selaraskan tick dengan kelipatan interval pada jam dinding (mis. awal setiap detik)
+        """
+        now = time.monotonic()
+        next_run = now + interval
+        if align:
+            next_run = now + interval - time.time() % interval
+        if run_immediately:
+            # Satu interval sebelum jadwal: jalan sekarang, tick berikutnya tetap pada fase yang sama
+            next_run -= interval
+        task = PeriodicTask(interval, callback, next_run)
+        heapq.heappush(self._heap, (task.next_run, next(self._counter), task))
+    
+    async def _run(self) -> None:
+        """Loop scheduler: tidur sampai tugas terdekat jatuh tempo, lalu update kontrol yang berubah sekali."""
+        while self._heap:
+            timeout = self._heap[0][0] - time.monotonic()
+            await asyncio.sleep(max(timeout, 0))
+            
+            now = time.monotonic()
+            changed: List[ft.Control] = []
+            while self._heap and self._heap[0][0] <= now:
+                _, _, task = heapq.heappop(self._heap)
+                try:
+                    changed.extend(task.callback())
+                except Exception:
+                    # Satu tugas yang gagal tidak boleh menghentikan tugas lain; tetap dijadwalkan ulang
+                    logger.exception("Tugas periodik gagal: %r", task.callback)
+                # Jadwal tetap pada kelipatan interval (tanpa drift), lewati tick yang terlewat
+                while task.next_run <= now:
+                    task.next_run += task.interval
+                heapq.heappush(self._heap, (task.next_run, next(self._counter), task))
+            
+            # Lewati update jika tidak ada nilai yang berubah; update lewat coalescer bersama agar
+            # tick yang bertepatan dengan update markdown/status tetap menjadi satu page.update()
+            if changed:
+                coalescer.request_update(self.page, *changed)
+    
+    def start(self) -> None:
+        """Memulai scheduler sebagai task di event loop Flet."""
+        self._future = self.page.run_task(self._run)
+    
+    def stop(self) -> None:
+        """Menghentikan scheduler (aman dipanggil dari thread mana pun)."""
+        if self._future:
+            self._future.cancel()
+            self._future = None
@@ -2,6 +2,8 @@
 Definisi tema dan warna untuk aplikasi
 """
 
+import flet as ft
+
 class AppColors:
     """Palet warna aplikasi."""
     
@@ -35,4 +37,17 @@ class AppStyles:
     FONT_SUBTITLE = 18
     FONT_BODY = 16
     FONT_CAPTION = 14
-    FONT_SMALL = 12 
\ No newline at end of file
+    FONT_SMALL = 12 
+
+# Objek style Flet yang identik di beberapa panel dibuat sekali dan dipakai bersama
+# (nilai-nilai ini tidak diubah setelah dibuat)
+PRIMARY_BORDER = ft.border.all(2, AppColors.PRIMARY)
+SECONDARY_BORDER = ft.border.all(2, AppColors.SECONDARY)
+ACCENT_BORDER = ft.border.all(2, AppColors.ACCENT)
+ACCENT_BUTTON_STYLE = ft.ButtonStyle(
+    shape=ft.RoundedRectangleBorder(radius=AppStyles.BORDER_RADIUS),
+    color=AppColors.BASE,
+    bgcolor=AppColors.ACCENT
+)
+PRIMARY_LABEL_STYLE = ft.TextStyle(color=AppColors.PRIMARY)
+TOP_MARGIN = ft.margin.only(top=AppStyles.DEFAULT_MARGIN)